@@ -0,0 +1,95 @@
+import asyncio
+import collections
+import logging
+import os
+import sqlite3
+
+from models import delete_users, get_pending_deletions, purge_user_data
+
+ACCOUNT_DELETE_BATCH = int(os.getenv("ACCOUNT_DELETE_BATCH", "200"))
+ACCOUNT_DELETE_PAUSE = float(os.getenv("ACCOUNT_DELETE_PAUSE", "0.01"))
+
+logger = logging.getLogger(__name__)
+
+
+class AccountDeletionJob:
+    """Deletes accounts and all of their rows in the background.
+
+    Submitting an account deletes its user row straight away, so the account stops working
+    immediately, and records it in pending_deletions. Accounts are then purged one at a time:
+    chats, archived chats and feedbacks are deleted in transactions of at most `batch_size`
+    rows with `pause` seconds in between. `resume` re-queues purges that a restart interrupted.
+    """
+
+    def __init__(self, batch_size=ACCOUNT_DELETE_BATCH, pause=ACCOUNT_DELETE_PAUSE):
+        self.batch_size = batch_size
+        self.pause = pause
+        self._queue = collections.deque()
+        self._queued = set()
+        self._task = None
+        self.current = None
+        self.accounts_deleted = 0
+        self.rows_deleted = 0
+        self.failed = collections.deque(maxlen=100)
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def submit(self, user_ids):
+        """Deletes the accounts, queues their purge and starts the worker if it is idle; returns the number queued"""
+        user_ids = list(dict.fromkeys(user_ids))
+        await asyncio.get_running_loop().run_in_executor(None, delete_users, user_ids)
+        return self._enqueue(user_ids)
+
+    def resume(self):
+        """Queues every purge recorded in pending_deletions that has not finished"""
+        return self._enqueue(get_pending_deletions())
+
+    def _enqueue(self, user_ids):
+        queued = [user_id for user_id in dict.fromkeys(user_ids) if user_id not in self._queued and user_id != self.current]
+        self._queue.extend(queued)
+        self._queued.update(queued)
+        if queued and not self.running:
+            self._task = asyncio.create_task(self._run())
+        return len(queued)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def delete_account(self, user_id):
+        return purge_user_data(user_id, self.batch_size, self.pause)
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "queued": len(self._queue),
+            "current": self.current,
+            "accounts_deleted": self.accounts_deleted,
+            "rows_deleted": self.rows_deleted,
+            "failed": list(self.failed),
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._queue:
+            self.current = self._queue.popleft()
+            self._queued.discard(self.current)
+            try:
+                self.rows_deleted += await loop.run_in_executor(None, self.delete_account, self.current)
+                self.accounts_deleted += 1
+            except sqlite3.Error:
+                logger.exception("Deleting account %s failed", self.current)
+                self.failed.append(self.current)
+            finally:
+                self.current = None
+
+
+account_deletions = AccountDeletionJob()
@@ -1,29 +1,83 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+import time
+_IMPORT_STARTED = time.perf_counter()
+import logging
+import math
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Depends, Query, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import Optional, List
-from pathlib import Path
+from contextlib import asynccontextmanager
+import asyncio
 import os, json
+import datetime
 from dotenv import load_dotenv
 load_dotenv()
 
 from db import init_db
 from models import (
-    create_user, delete_user, get_user_by_email, update_user,
-    add_chat, get_chats, clear_chats, get_feedbacks, add_feedback,
-    get_total_users, get_total_chats, get_total_feedbacks, get_all_feedbacks
+    create_user, get_user_by_email, get_cached_user, update_user, update_password, user_cache,
+    clear_chats, get_feedbacks, iter_feedbacks, add_feedback,
+    get_total_feedbacks, get_all_feedbacks, get_stats_counters, get_daily_activity
 )
-from auth import hash_password, verify_password, create_jwt, decode_jwt
-from bot import wellness_response
-
-init_db()
+from auth import (
+    hash_password_async, verify_password_async, needs_rehash, shutdown_password_pool,
+    create_jwt, decode_jwt
+)
+from bot import (
+    conversation_context, warm_up_templates,
+    wellness_response_async, wellness_responses_batch_async, wellness_response_stream
+)
+from knowledge_base import knowledge_base_store
+from response_templates import TEMPLATE_WARM_UP, template_translations
+from translator import translator
+from chat_log import chat_log, CHAT_WRITE_BEHIND
+from retention import chat_retention
+from account_deletion import account_deletions
+from rate_limit import concurrency_limiter, rate_limits
+from metrics import HTTP_REQUEST_SECONDS, STAGE_SECONDS, registry, slow_request_profiler, startup_timer, timed
+
+logger = logging.getLogger(__name__)
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
 
-KNOWLEDGE_BASE_PATH = Path(__file__).parent / "knowledge_base.json"
-
-app = FastAPI(title="WellBot API", version="1.4.0")
+CHAT_PAGE_SIZE = 50
+MAX_CHAT_PAGE_SIZE = 200
+MAX_ACTIVITY_DAYS = 366
+FEEDBACK_PAGE_SIZE = 50
+MAX_FEEDBACK_PAGE_SIZE = 200
+LATEST_REVIEWS_COUNT = 3
+MAX_CHAT_BATCH_SIZE = 100
+MAX_USER_DELETION_BATCH = 500
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with startup_timer.phase("init_db"):
+        init_db()
+    with startup_timer.phase("knowledge_base"):
+        knowledge_base_store.snapshot
+    with startup_timer.phase("translation_backend"):
+        translator.backend
+    with startup_timer.phase("background_tasks"):
+        if CHAT_WRITE_BEHIND:
+            chat_log.start()
+        chat_retention.start()
+        account_deletions.resume()
+        warm_up = asyncio.create_task(warm_up_templates()) if TEMPLATE_WARM_UP else None
+    logger.info("Startup timing: %s", startup_timer.report())
+    yield
+    if warm_up is not None:
+        warm_up.cancel()
+    await chat_retention.stop()
+    await account_deletions.stop()
+    await chat_log.stop()
+    shutdown_password_pool()
+
+
+app = FastAPI(title="WellBot API", version="1.4.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],
@@ -35,6 +89,55 @@ app.add_middleware(
 security = HTTPBearer()
 
 
+@app.middleware("http")
+async def limit_concurrency(request: Request, call_next):
+    if not concurrency_limiter.try_acquire():
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server is busy, please retry shortly"},
+            headers={"Retry-After": "1"},
+        )
+    try:
+        response = await call_next(request)
+    except BaseException:
+        concurrency_limiter.release()
+        raise
+    # Streamed bodies (SSE chat, NDJSON exports) keep the slot until their last chunk is sent
+    body = response.body_iterator
+
+    async def release_after_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            concurrency_limiter.release()
+
+    response.body_iterator = release_after_body()
+    return response
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        if slow_request_profiler.should_sample():
+            with slow_request_profiler.profile(f"{request.method} {request.url.path}"):
+                response = await call_next(request)
+        else:
+            response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            route=route.path if route else "unmatched",
+            method=request.method,
+            status=status_code,
+        )
+
+
 def format_response(data: dict) -> str:
     """Formats dictionary into readable string with line breaks"""
     return "\n".join([f"{key}: {value}" for key, value in data.items()])
@@ -59,6 +162,10 @@ class ChatMessage(BaseModel):
     userId: Optional[int] = None
 
 
+class ChatBatch(BaseModel):
+    messages: List[str]
+
+
 class UserUpdate(BaseModel):
     username: str
     language: str
@@ -76,6 +183,10 @@ class AdminLogin(BaseModel):
     password: str
 
 
+class UserDeletion(BaseModel):
+    user_ids: List[int]
+
+
 class DiseaseModel(BaseModel):
     name: str
     symptoms: List[str]
@@ -89,12 +200,30 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     if payload is None:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     email = payload.get("email")
-    user = get_user_by_email(email)
+    user = get_cached_user(payload.get("user_id"), email)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
 
+def enforce_rate_limit(name: str, user_id: int, cost: int = 1):
+    retry_after = rate_limits.acquire(name, user_id, cost)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def rate_limited(name: str):
+    """get_current_user plus a token-bucket check of the named limit, keyed by user id"""
+    async def dependency(current_user=Depends(get_current_user)):
+        enforce_rate_limit(name, current_user[0])
+        return current_user
+    return dependency
+
+
 async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     payload = decode_jwt(token)
@@ -111,7 +240,7 @@ async def register_user(user_data: UserRegister):
     existing_user = get_user_by_email(user_data.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     create_user(
         user_data.username, user_data.email, hashed_password,
         user_data.language, user_data.age, user_data.gender
@@ -122,8 +251,10 @@ async def register_user(user_data: UserRegister):
 @app.post("/api/login")
 async def login_user(login_data: UserLogin):
     user = get_user_by_email(login_data.email)
-    if not user or not verify_password(login_data.password, user[3]):
+    if not user or not await verify_password_async(login_data.password, user[3]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    if needs_rehash(user[3]):
+        update_password(user[0], await hash_password_async(login_data.password))
     token = create_jwt(user[0], user[2])
     user_data = {
         "id": user[0],
@@ -137,25 +268,115 @@ async def login_user(login_data: UserLogin):
 
 
 @app.post("/api/chat")
-async def send_chat_message(chat_data: ChatMessage, current_user=Depends(get_current_user)):
+async def send_chat_message(chat_data: ChatMessage, current_user=Depends(rate_limited("chat"))):
     user_id = current_user[0]
     user_language = current_user[4] if len(current_user) > 4 and current_user[4] else "English"
-    response = wellness_response(chat_data.message, user_language, user_id)
-    add_chat(user_id, chat_data.message, response)
+    response = await wellness_response_async(chat_data.message, user_language, user_id)
+    with timed(STAGE_SECONDS, stage="persist"):
+        await chat_log.record(user_id, chat_data.message, response)
     return {"success": True, "response": response}
 
 
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def stream_chat_message(chat_data: ChatMessage, current_user=Depends(rate_limited("chat"))):
+    user_id = current_user[0]
+    user_language = current_user[4] if len(current_user) > 4 and current_user[4] else "English"
+
+    async def events():
+        sections = []
+        async for section in wellness_response_stream(chat_data.message, user_language, user_id):
+            sections.append(section)
+            yield sse_event("section", {"index": len(sections) - 1, "text": section})
+        response = "\n\n".join(sections)
+        with timed(STAGE_SECONDS, stage="persist"):
+            await chat_log.record(user_id, chat_data.message, response)
+        yield sse_event("done", {"response": response})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/chat/batch")
+async def send_chat_batch(chat_batch: ChatBatch, current_user=Depends(get_current_user)):
+    if not chat_batch.messages:
+        raise HTTPException(status_code=400, detail="No messages to send")
+    if len(chat_batch.messages) > MAX_CHAT_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CHAT_BATCH_SIZE} messages per batch")
+    user_id = current_user[0]
+    enforce_rate_limit("chat_batch", user_id, cost=len(chat_batch.messages))
+    user_language = current_user[4] if len(current_user) > 4 and current_user[4] else "English"
+    responses = await wellness_responses_batch_async(chat_batch.messages, user_language, user_id)
+    with timed(STAGE_SECONDS, stage="persist"):
+        await chat_log.record_many(user_id, list(zip(chat_batch.messages, responses)))
+    return {
+        "success": True,
+        "responses": [
+            {"message": message, "response": response}
+            for message, response in zip(chat_batch.messages, responses)
+        ],
+    }
+
+
+def chat_to_dict(chat) -> dict:
+    return {"id": chat[3], "message": chat[0], "response": chat[1], "timestamp": chat[2]}
+
+
 @app.get("/api/chats/{user_id}")
-async def get_user_chats(user_id: int, current_user=Depends(get_current_user)):
+async def get_user_chats(
+    user_id: int,
+    before_id: Optional[int] = None,
+    limit: int = Query(CHAT_PAGE_SIZE, ge=1, le=MAX_CHAT_PAGE_SIZE),
+    current_user=Depends(get_current_user),
+):
     if current_user[0] != user_id:
         raise HTTPException(status_code=403, detail="Access denied")
-    chats = get_chats(user_id)
+    chats = chat_log.get_chats(user_id, before_id=before_id, limit=limit)
+    committed = [c for c in chats if c[3] is not None]
     return {
         "success": True,
-        "chats": [{"message": c[0], "response": c[1], "timestamp": c[2]} for c in chats]
+        "chats": [chat_to_dict(c) for c in chats],
+        "next_before_id": committed[0][3] if len(committed) == limit else None,
     }
 
 
+@app.get("/api/chats/{user_id}/export")
+async def export_user_chats(user_id: int, current_user=Depends(rate_limited("export"))):
+    if current_user[0] != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    rows = (json.dumps(chat_to_dict(c), ensure_ascii=False) + "\n" for c in chat_log.iter_chats(user_id))
+    return StreamingResponse(rows, media_type="application/x-ndjson")
+
+
+@app.get("/api/user/export")
+async def export_user_data(current_user=Depends(rate_limited("export"))):
+    """Streams the caller's profile, chats and feedbacks as NDJSON, one record per line"""
+    user_id = current_user[0]
+
+    def records():
+        yield {
+            "type": "profile", "id": user_id, "username": current_user[1], "email": current_user[2],
+            "language": current_user[4], "age": current_user[5], "gender": current_user[6],
+        }
+        for chat in chat_log.iter_chats(user_id):
+            yield {"type": "chat", **chat_to_dict(chat)}
+        for feedback_id, rating, review, timestamp in iter_feedbacks(user_id):
+            yield {"type": "feedback", "id": feedback_id, "rating": rating, "review": review, "timestamp": timestamp}
+
+    lines = (json.dumps(record, ensure_ascii=False) + "\n" for record in records())
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="wellbot-user-{user_id}.ndjson"'},
+    )
+
+
 @app.put("/api/user/update")
 async def update_user_profile(user_data: UserUpdate, current_user=Depends(get_current_user)):
     update_user(current_user[0], user_data.username, user_data.language, user_data.age, user_data.gender)
@@ -164,7 +385,8 @@ async def update_user_profile(user_data: UserUpdate, current_user=Depends(get_cu
 
 @app.delete("/api/user/delete")
 async def delete_user_account(current_user=Depends(get_current_user)):
-    delete_user(current_user[0])
+    chat_log.forget(current_user[0])
+    await account_deletions.submit([current_user[0]])
     return {"success": True, "message": "Account deleted successfully"}
 
 
@@ -172,12 +394,13 @@ async def delete_user_account(current_user=Depends(get_current_user)):
 async def clear_user_chats(user_id: int, current_user=Depends(get_current_user)):
     if current_user[0] != user_id:
         raise HTTPException(status_code=403, detail="Access denied")
+    chat_log.forget(user_id)
     clear_chats(user_id)
     return {"success": True, "message": "Chat history cleared"}
 
 
 @app.post("/api/feedback")
-async def submit_feedback(feedback: Feedback, current_user=Depends(get_current_user)):
+async def submit_feedback(feedback: Feedback, current_user=Depends(rate_limited("feedback"))):
     add_feedback(current_user[0], feedback.rating, feedback.review)
     return {"success": True, "message": "Feedback submitted successfully!"}
 
@@ -197,42 +420,114 @@ async def admin_login(admin_data: AdminLogin):
 
 @app.get("/api/admin/dashboard")
 async def admin_dashboard(current_admin=Depends(get_current_admin)):
+    counters = get_stats_counters()
     return {
         "success": True,
         "stats": {
-            "total_users": get_total_users(),
-            "total_chats": get_total_chats(),
-            "total_feedbacks": get_total_feedbacks(),
+            "total_users": counters.get("users", 0),
+            "total_chats": counters.get("chats", 0) + counters.get("archived_chats", 0),
+            "total_feedbacks": counters.get("feedbacks", 0),
         },
     }
 
 
+@app.get("/api/admin/activity")
+async def admin_activity(
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    current_admin=Depends(get_current_admin),
+):
+    end = end or datetime.date.today()
+    start = start or end - datetime.timedelta(days=29)
+    if start > end:
+        raise HTTPException(400, "start must not be after end")
+    if (end - start).days >= MAX_ACTIVITY_DAYS:
+        raise HTTPException(400, f"Date range is limited to {MAX_ACTIVITY_DAYS} days")
+
+    chats, feedbacks = get_daily_activity(start, end)
+    days = {}
+    day = start
+    while day <= end:
+        days[day.isoformat()] = {"date": day.isoformat(), "chats": 0, "feedbacks": {}}
+        day += datetime.timedelta(days=1)
+    for day, count in chats:
+        days[day]["chats"] = count
+    for day, rating, count in feedbacks:
+        days[day]["feedbacks"][rating] = count
+    return {"success": True, "activity": list(days.values())}
+
+
+@app.get("/api/admin/cache-stats")
+async def admin_cache_stats(current_admin=Depends(get_current_admin)):
+    return {
+        "success": True,
+        "caches": {
+            "translation": translator.cache_stats(),
+            "users": user_cache.stats(),
+            "conversation_context": conversation_context.stats(),
+        },
+        "chat_log": chat_log.stats(),
+        "retention": chat_retention.stats(),
+        "rate_limits": rate_limits.stats(),
+        "concurrency": concurrency_limiter.stats(),
+        "template_translations": template_translations.stats(),
+        "translation_backend": translator.backend_stats(),
+    }
+
+
+@app.get("/api/admin/startup")
+async def admin_startup(current_admin=Depends(get_current_admin)):
+    return startup_timer.report()
+
+
+@app.get("/api/admin/metrics", response_class=PlainTextResponse)
+async def admin_metrics(current_admin=Depends(get_current_admin)):
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/admin/slow-requests")
+async def admin_slow_requests(current_admin=Depends(get_current_admin)):
+    return {
+        "success": True,
+        "enabled": slow_request_profiler.enabled,
+        "reports": list(slow_request_profiler.reports),
+    }
+
+
 @app.get("/api/admin/feedbacks")
-async def admin_get_feedbacks(current_admin=Depends(get_current_admin)):
-    feedbacks = get_all_feedbacks()
-    return {"success": True, "feedbacks": feedbacks}
+async def admin_get_feedbacks(
+    limit: int = Query(FEEDBACK_PAGE_SIZE, ge=1, le=MAX_FEEDBACK_PAGE_SIZE),
+    before_timestamp: Optional[str] = None,
+    before_id: Optional[int] = None,
+    rating: Optional[str] = None,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    current_admin=Depends(get_current_admin),
+):
+    if (before_timestamp is None) != (before_id is None):
+        raise HTTPException(400, "before_timestamp and before_id must be given together")
+    before = (before_timestamp, before_id) if before_id is not None else None
+    feedbacks = get_all_feedbacks(limit=limit, before=before, rating=rating, start_date=start, end_date=end)
+    next_cursor = None
+    if len(feedbacks) == limit:
+        next_cursor = {"before_timestamp": feedbacks[-1]["timestamp"], "before_id": feedbacks[-1]["id"]}
+    return {"success": True, "feedbacks": feedbacks, "next_cursor": next_cursor}
 
 
 @app.get("/api/admin/stats")
 async def admin_stats(current_admin=Depends(get_current_admin)):
     try:
-        with open(KNOWLEDGE_BASE_PATH, "r", encoding="utf-8") as f:
-            knowledge = json.load(f)
-        total_diseases = len(knowledge)
-        feedbacks = get_all_feedbacks()
+        total_diseases = len(knowledge_base_store.data)
 
-        if not feedbacks:
+        if not get_total_feedbacks():
             for i in range(5):
                 add_feedback(1, "Positive" if i % 2 == 0 else "Negative", f"Sample review {i + 1}")
-            feedbacks = get_all_feedbacks()
-
-        positive = sum(1 for f in feedbacks if f["rating"].lower() == "positive")
-        negative = sum(1 for f in feedbacks if f["rating"].lower() == "negative")
 
+        counters = get_stats_counters()
         return {
-            "users": f"👤 {get_total_users()}",
-            "positive": f"👍 {positive}",
-            "negative": f"👎 {negative}",
+            "users": f"👤 {counters.get('users', 0)}",
+            "positive": f"👍 {counters.get('rating:positive', 0)}",
+            "negative": f"👎 {counters.get('rating:negative', 0)}",
             "diseases": f"🩺 {total_diseases}"
         }
     except Exception as e:
@@ -241,56 +536,66 @@ async def admin_stats(current_admin=Depends(get_current_admin)):
 
 @app.get("/api/admin/latest-reviews")
 async def latest_reviews(current_admin=Depends(get_current_admin)):
-    feedbacks = get_all_feedbacks()[:3]
+    feedbacks = get_all_feedbacks(limit=LATEST_REVIEWS_COUNT)
     return {"success": True, "latest_reviews": feedbacks}
 
 
+@app.post("/api/admin/users/delete")
+async def admin_delete_users(deletion: UserDeletion, current_admin=Depends(get_current_admin)):
+    if len(deletion.user_ids) > MAX_USER_DELETION_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_USER_DELETION_BATCH} accounts per request")
+    for user_id in deletion.user_ids:
+        chat_log.forget(user_id)
+    queued = await account_deletions.submit(deletion.user_ids)
+    return {"success": True, "queued": queued}
+
+
+@app.get("/api/admin/users/deletions")
+async def admin_user_deletions(current_admin=Depends(get_current_admin)):
+    return {"success": True, "deletions": account_deletions.stats()}
+
+
 @app.get("/api/admin/knowledge-base")
 async def get_knowledge_base(current_admin=Depends(get_current_admin)):
-    with open(KNOWLEDGE_BASE_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = knowledge_base_store.data
     diseases = [{"name": k, "symptoms": v["symptoms"], "advice": v["advice"]} for k, v in data.items()]
     return {"success": True, "knowledge_base": diseases}
 
 
 @app.post("/api/admin/add-disease")
-async def add_disease(disease: DiseaseModel, current_admin=Depends(get_current_admin)):
-    with open(KNOWLEDGE_BASE_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    key = disease.name.lower()
-    if key in data:
+async def add_disease(disease: DiseaseModel, background_tasks: BackgroundTasks, current_admin=Depends(get_current_admin)):
+    try:
+        await run_in_threadpool(knowledge_base_store.add, disease.name, {"symptoms": disease.symptoms, "advice": disease.advice})
+    except ValueError:
         raise HTTPException(400, "Disease already exists")
-    data[key] = {"symptoms": disease.symptoms, "advice": disease.advice}
-    with open(KNOWLEDGE_BASE_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    if TEMPLATE_WARM_UP:
+        background_tasks.add_task(warm_up_templates)
     return {"success": True, "message": f"{disease.name} added successfully!"}
 
 @app.put("/api/admin/edit-disease/{name}")
-async def edit_disease(name: str, disease: DiseaseModel, current_admin=Depends(get_current_admin)):
-    with open(KNOWLEDGE_BASE_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    key = name.lower()
-    if key not in data:
+async def edit_disease(name: str, disease: DiseaseModel, background_tasks: BackgroundTasks, current_admin=Depends(get_current_admin)):
+    try:
+        await run_in_threadpool(knowledge_base_store.update, name, {"symptoms": disease.symptoms, "advice": disease.advice})
+    except KeyError:
         raise HTTPException(404, "Disease not found")
-    data[key] = {"symptoms": disease.symptoms, "advice": disease.advice}
-    with open(KNOWLEDGE_BASE_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    if TEMPLATE_WARM_UP:
+        background_tasks.add_task(warm_up_templates)
     return {"success": True, "message": f"{name} updated successfully!"}
 
 
 @app.delete("/api/admin/delete-disease/{name}")
 async def remove_disease(name: str, current_admin=Depends(get_current_admin)):
-    with open(KNOWLEDGE_BASE_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    key = name.lower()
-    if key not in data:
+    try:
+        await run_in_threadpool(knowledge_base_store.remove, name)
+    except KeyError:
         raise HTTPException(404, "Disease not found")
-    del data[key]
-    with open(KNOWLEDGE_BASE_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
     return {"success": True, "message": f"{name} deleted successfully!"}
 
 
+startup_timer.record("import_api", time.perf_counter() - _IMPORT_STARTED)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True)
+
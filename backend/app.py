@@ -1,4 +1,5 @@
 import streamlit as st
+import datetime
 import sys
 import os
 
@@ -8,13 +9,15 @@ if BACKEND_DIR not in sys.path:
     sys.path.append(BACKEND_DIR)
 
 from db import init_db
-from models import create_user, get_user_by_email, update_user, add_chat, get_chats, clear_chats
+from models import create_user, get_user_by_email, update_user, add_chat, get_chats, get_chats_after, clear_chats
 from auth import hash_password, verify_password, create_jwt, decode_jwt
-from bot import wellness_response
 
-init_db()
+@st.cache_resource
+def setup_database():
+    init_db()
 
 LANGUAGE_OPTIONS = ["English", "Hindi"]
+CHAT_PAGE_SIZE = 50
 
 def register():
     st.subheader("Create Account")
@@ -68,25 +71,48 @@ def account_settings(user):
         st.session_state['user'] = get_user_by_email(user[2])
         st.success("Account updated!")
 
+def load_history(user_id):
+    history = st.session_state.get("chat_history")
+    if history is None or history["user_id"] != user_id:
+        turns = get_chats(user_id, limit=CHAT_PAGE_SIZE)
+        history = {"user_id": user_id, "turns": turns, "has_more": len(turns) == CHAT_PAGE_SIZE}
+        st.session_state["chat_history"] = history
+    else:
+        last_id = history["turns"][-1][3] if history["turns"] else 0
+        history["turns"].extend(get_chats_after(user_id, last_id))
+    return history
+
+def load_older(history):
+    older = get_chats(history["user_id"], before_id=history["turns"][0][3], limit=CHAT_PAGE_SIZE)
+    history["turns"][:0] = older
+    history["has_more"] = len(older) == CHAT_PAGE_SIZE
+
 def chatbot(user):
     st.subheader("Wellness Chatbot")
-    chats = get_chats(user[0])
-    for msg, resp, ts in chats:
+    history = load_history(user[0])
+    if history["has_more"]:
+        st.button("Load older messages", on_click=load_older, args=(history,))
+    for msg, resp, ts, _ in history["turns"]:
         st.markdown(f"**You:** {msg}\n\n**Bot:** {resp}\n\n*{ts}*")
     msg = st.text_input("Your message")
     if st.button("Send"):
         if not msg:
             st.warning("Type a message first.")
         else:
+            from bot import wellness_response
             user_lang = user[4] if user[4] else "English"
             resp = wellness_response(msg, user_lang)
-            add_chat(user[0], msg, resp)
+            chat_id = add_chat(user[0], msg, resp)
+            timestamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            history["turns"].append((msg, resp, timestamp, chat_id))
             st.experimental_rerun()
     if st.button("Clear Chat"):
         clear_chats(user[0])
+        st.session_state.pop("chat_history", None)
         st.experimental_rerun()
 
 def main():
+    setup_database()
     st.title("Wellness Chatbot")
     if "token" not in st.session_state:
         menu = st.sidebar.selectbox("Menu", ["Login", "Register"])
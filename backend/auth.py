@@ -1,20 +1,28 @@
+import asyncio
 import bcrypt
 import jwt
 import datetime
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
 
 JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(os.cpu_count() or 1)))
 
 if not JWT_SECRET:
     raise Exception("JWT_SECRET not set in environment variables")
 
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+_password_pool = None
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
 
 
 def verify_password(password: str, hashed: bytes | str) -> bool:
@@ -23,6 +31,43 @@ def verify_password(password: str, hashed: bytes | str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed)
 
 
+def needs_rehash(hashed: bytes | str) -> bool:
+    """True when a stored hash was made with a cost other than BCRYPT_ROUNDS"""
+    if isinstance(hashed, bytes):
+        hashed = hashed.decode('utf-8')
+    try:
+        return int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def _get_password_pool() -> ProcessPoolExecutor:
+    global _password_pool
+    if _password_pool is None:
+        _password_pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _password_pool
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_pool(), hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: bytes | str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_pool(), verify_password, password, hashed)
+
+
+def shutdown_password_pool():
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(cancel_futures=True)
+        _password_pool = None
+
+
 def create_jwt(user_id: int, email: str) -> str:
     payload = {
         "user_id": user_id,
@@ -0,0 +1,240 @@
+"""Offline load test for the WellBot API.
+
+Starts the FastAPI app in-process (lifespan included) against a temporary SQLite database,
+replaces TranslationService's online backend with a stub that sleeps for a configurable
+latency, and drives a weighted mix of register, login, chat, history, feedback
+and admin-dashboard requests at each concurrency level. Prints (or writes) a JSON report with
+throughput and p50/p95/p99 latency per endpoint.
+
+Run from the backend directory:
+    python -m benchmarks.api_load --concurrency 1 8 32 --requests 2000 --translation-latency-ms 50
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from collections import defaultdict
+
+from benchmarks.common import summarize, use_temp_database
+
+DEFAULT_MIX = {
+    "register": 2,
+    "login": 5,
+    "chat": 50,
+    "history": 20,
+    "feedback": 8,
+    "admin_dashboard": 5,
+}
+CHAT_MESSAGES = [
+    "hi",
+    "I have a fever and a headache",
+    "my stomach ache is getting worse",
+    "I think I have a cold and a sore throat",
+    "thanks a lot",
+    "what should I eat today?",
+]
+PASSWORD = "bench-password"
+
+
+class StubBackend:
+    """Stands in for the online translation backend with a fixed per-call latency."""
+
+    name = "stub"
+
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+        self.calls = 0
+
+    def translate(self, text, dest_lang):
+        self.calls += 1
+        time.sleep(self.latency_s)
+        return self._result(text, dest_lang)
+
+    def translate_batch(self, texts, dest_lang):
+        self.calls += 1
+        time.sleep(self.latency_s)
+        return [self._result(text, dest_lang) for text in texts]
+
+    @staticmethod
+    def _result(text, dest_lang):
+        return text if dest_lang == "en" else f"[{dest_lang}] {text}"
+
+
+class Session:
+    def __init__(self, email, user_id, token):
+        self.email = email
+        self.user_id = user_id
+        self.token = token
+
+    @property
+    def headers(self):
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+class LoadRun:
+    def __init__(self, client, admin_headers, sessions, rng):
+        self.client = client
+        self.admin_headers = admin_headers
+        self.sessions = sessions
+        self.rng = rng
+        self.counter = itertools.count()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def register(self):
+        n = next(self.counter)
+        email = f"load-{os.getpid()}-{n}-{time.monotonic_ns()}@example.com"
+        return await self.client.post("/api/register", json={
+            "username": f"load{n}", "email": email, "password": PASSWORD,
+            "language": self.rng.choice(["English", "Hindi"]), "age": 30, "gender": "Other",
+        })
+
+    async def login(self):
+        session = self.rng.choice(self.sessions)
+        return await self.client.post("/api/login", json={"email": session.email, "password": PASSWORD})
+
+    async def chat(self):
+        session = self.rng.choice(self.sessions)
+        return await self.client.post(
+            "/api/chat", json={"message": self.rng.choice(CHAT_MESSAGES)}, headers=session.headers
+        )
+
+    async def history(self):
+        session = self.rng.choice(self.sessions)
+        return await self.client.get(f"/api/chats/{session.user_id}", headers=session.headers)
+
+    async def feedback(self):
+        session = self.rng.choice(self.sessions)
+        return await self.client.post(
+            "/api/feedback",
+            json={"rating": self.rng.choice(["Positive", "Negative"]), "review": "load test"},
+            headers=session.headers,
+        )
+
+    async def admin_dashboard(self):
+        return await self.client.get("/api/admin/dashboard", headers=self.admin_headers)
+
+    async def worker(self, plan):
+        while plan:
+            name = plan.pop()
+            start = time.perf_counter()
+            try:
+                res = await getattr(self, name)()
+                ok = res.status_code < 400
+            except Exception:
+                ok = False
+            self.latencies[name].append((time.perf_counter() - start) * 1000)
+            if not ok:
+                self.errors[name] += 1
+
+
+async def create_sessions(client, count, rng):
+    sessions = []
+    for i in range(count):
+        email = f"seed-{i}@example.com"
+        await client.post("/api/register", json={
+            "username": f"seed{i}", "email": email, "password": PASSWORD,
+            "language": "Hindi" if i % 3 == 0 else "English", "age": 30, "gender": "Other",
+        })
+        res = await client.post("/api/login", json={"email": email, "password": PASSWORD})
+        res.raise_for_status()
+        data = res.json()
+        sessions.append(Session(email, data["user"]["id"], data["token"]))
+        for _ in range(rng.randint(0, 20)):
+            await client.post("/api/chat", json={"message": rng.choice(CHAT_MESSAGES)}, headers=sessions[-1].headers)
+    return sessions
+
+
+async def run(args):
+    use_temp_database(prefix="wellbot-load-")
+    os.environ.setdefault("ADMIN_EMAIL", "admin@example.com")
+    os.environ.setdefault("ADMIN_PASSWORD", "admin-password")
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    # Keep the warm-up from writing stub translations next to the real knowledge base
+    os.environ.setdefault("TEMPLATE_WARM_UP", "0")
+    # Measure the server itself rather than the per-user limits and the concurrency cap
+    for name in ("CHAT", "CHAT_BATCH", "EXPORT", "FEEDBACK"):
+        os.environ.setdefault(f"RATE_LIMIT_{name}", "0")
+    os.environ.setdefault("MAX_CONCURRENT_REQUESTS", "0")
+
+    import httpx
+    import api
+    from translator import translator
+
+    stub = StubBackend(args.translation_latency_ms / 1000)
+    translator.backend = stub
+    rng = random.Random(args.seed)
+    mix = dict(DEFAULT_MIX)
+    for item in args.mix or []:
+        name, _, weight = item.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown endpoint {name!r} in --mix; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name] = int(weight)
+
+    report = {
+        "config": {
+            "requests_per_level": args.requests,
+            "translation_latency_ms": args.translation_latency_ms,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "mix": mix,
+        },
+        "levels": [],
+    }
+    async with api.lifespan(api.app):
+        async with httpx.AsyncClient(app=api.app, base_url="http://bench", timeout=None) as client:
+            res = await client.post("/api/admin/login", json={
+                "email": os.environ["ADMIN_EMAIL"], "password": os.environ["ADMIN_PASSWORD"],
+            })
+            res.raise_for_status()
+            admin_headers = {"Authorization": f"Bearer {res.json()['token']}"}
+            sessions = await create_sessions(client, args.users, rng)
+
+            names = list(mix)
+            weights = [mix[name] for name in names]
+            for concurrency in args.concurrency:
+                load = LoadRun(client, admin_headers, sessions, rng)
+                plan = rng.choices(names, weights=weights, k=args.requests)
+                start = time.perf_counter()
+                await asyncio.gather(*(load.worker(plan) for _ in range(concurrency)))
+                elapsed = time.perf_counter() - start
+                endpoints = {}
+                for name, samples in sorted(load.latencies.items()):
+                    endpoints[name] = summarize(samples, elapsed)
+                    endpoints[name]["errors"] = load.errors[name]
+                all_samples = [ms for samples in load.latencies.values() for ms in samples]
+                report["levels"].append({
+                    "concurrency": concurrency,
+                    "elapsed_s": round(elapsed, 3),
+                    "overall": summarize(all_samples, elapsed),
+                    "endpoints": endpoints,
+                })
+    report["translator_calls"] = stub.calls
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=1000, help="requests per concurrency level")
+    parser.add_argument("--users", type=int, default=20, help="pre-registered users")
+    parser.add_argument("--translation-latency-ms", type=float, default=50)
+    parser.add_argument("--bcrypt-rounds", type=int, default=int(os.getenv("BCRYPT_ROUNDS", "12")))
+    parser.add_argument("--mix", nargs="*", metavar="ENDPOINT=WEIGHT", help="override request mix weights")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
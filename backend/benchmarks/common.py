@@ -0,0 +1,26 @@
+import os
+import statistics
+import tempfile
+
+
+def use_temp_database(prefix="wellbot-bench-"):
+    """Points DB_NAME at a fresh temp file; call before importing db/models/api"""
+    path = os.path.join(tempfile.mkdtemp(prefix=prefix), "bench.db")
+    os.environ["DB_NAME"] = path
+    os.environ.setdefault("JWT_SECRET", "bench-secret")
+    return path
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(latencies_ms, elapsed_s):
+    return {
+        "requests": len(latencies_ms),
+        "throughput_rps": round(len(latencies_ms) / elapsed_s, 1) if elapsed_s else 0.0,
+        "p50_ms": round(statistics.median(latencies_ms), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+    }
@@ -0,0 +1,79 @@
+"""Insert/select throughput: connection-per-call (legacy) vs the pooled, tuned connection.
+
+Run from the backend directory:
+    python -m benchmarks.db_bench [--ops 2000]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix="wellbot-db-bench-")
+os.environ["DB_NAME"] = os.path.join(WORKDIR, "pooled.db")
+
+import db  # noqa: E402
+import models  # noqa: E402
+
+LEGACY_DB = os.path.join(WORKDIR, "legacy.db")
+
+
+def legacy_add_chat(user_id, message, response):
+    conn = sqlite3.connect(LEGACY_DB, check_same_thread=False)
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO chats (user_id, message, response) VALUES (?, ?, ?)",
+        (user_id, message, response)
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_get_user_by_email(email):
+    conn = sqlite3.connect(LEGACY_DB, check_same_thread=False)
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE email=?", (email,))
+    user = cursor.fetchone()
+    conn.close()
+    return user
+
+
+def ops_per_second(fn, ops):
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    return round(ops / (time.perf_counter() - start), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(LEGACY_DB)
+    db._create_tables(conn.cursor())
+    conn.execute("INSERT INTO users (username, email) VALUES ('bench', 'bench@example.com')")
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+    models.create_user("bench", "bench@example.com", "x", "English", 30, "Other")
+
+    results = {
+        "ops": args.ops,
+        "legacy": {
+            "insert_chat_per_s": ops_per_second(lambda i: legacy_add_chat(1, f"msg {i}", "resp"), args.ops),
+            "select_user_per_s": ops_per_second(lambda i: legacy_get_user_by_email("bench@example.com"), args.ops),
+        },
+        "pooled": {
+            "insert_chat_per_s": ops_per_second(lambda i: models.add_chat(1, f"msg {i}", "resp"), args.ops),
+            "select_user_per_s": ops_per_second(lambda i: models.get_user_by_email("bench@example.com"), args.ops),
+        },
+    }
+    db.close_connections()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
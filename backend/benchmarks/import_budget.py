@@ -0,0 +1,77 @@
+"""Checks that a cold `import api` stays within a time budget and has no side effects.
+
+Each run imports api in a fresh interpreter under `-X importtime`. Fails (exits non-zero) if
+the median cumulative import time exceeds the budget, if a module that should load lazily
+(googletrans, numpy) was imported, or if importing created the database file.
+
+Run from the backend directory:
+    python -m benchmarks.import_budget [--budget-ms 400] [--runs 5]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.common import use_temp_database
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+LAZY_MODULES = ("googletrans", "numpy", "ranking")
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+PROBE = "import sys, api; print(','.join(m for m in {lazy!r} if m in sys.modules))"
+
+
+def import_once(env):
+    """Imports api in a fresh interpreter; returns (api's cumulative us, {direct import: cumulative us}, lazy modules loaded)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(lazy=LAZY_MODULES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        sys.exit(f"import api failed:\n{result.stderr}")
+    api_us, children = None, {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        depth = len(match.group(3)) // 2
+        if depth == 0 and match.group(4) == "api":
+            api_us = int(match.group(2))
+        elif depth == 1:
+            children[match.group(4)] = int(match.group(2))
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return api_us, children, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=400)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = use_temp_database("wellbot-import-")
+    runs = [import_once(dict(os.environ)) for _ in range(args.runs)]
+
+    api_ms = statistics.median(api_us / 1000 for api_us, _, _ in runs)
+    _, children, loaded = runs[-1]
+    print(f"cold import api: median {api_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print("slowest imports under api (last run):")
+    for name, cumulative_us in sorted(children.items(), key=lambda item: -item[1])[:8]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if api_ms > args.budget_ms:
+        failures.append(f"import took {api_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    if loaded:
+        failures.append(f"lazily loaded modules were imported: {', '.join(loaded)}")
+    if any(Path(db_path).parent.iterdir()):
+        failures.append(f"importing api created files next to DB_NAME: {sorted(p.name for p in Path(db_path).parent.iterdir())}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Login throughput vs. password worker count, with /api/chat latency measured alongside.
+
+Runs the app in-process against a temporary database with translation stubbed out, once
+per PASSWORD_WORKERS value. Run from the backend directory:
+    python -m benchmarks.login_load [--logins 200] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import summarize, use_temp_database
+
+
+async def run_child(args):
+    use_temp_database(prefix="wellbot-login-")
+    os.environ.setdefault("TEMPLATE_WARM_UP", "0")
+    # The probe chats far faster than a user may; measure latency, not the per-user limit
+    os.environ.setdefault("RATE_LIMIT_CHAT", "0")
+    os.environ.setdefault("MAX_CONCURRENT_REQUESTS", "0")
+    import httpx
+    import api
+    import auth
+    import models
+    from translator import translator
+
+    translator._fetch = lambda text, dest_lang: text
+    token = auth.create_jwt(1, "bench@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with api.lifespan(api.app), httpx.AsyncClient(app=api.app, base_url="http://bench") as client:
+        models.create_user("bench", "bench@example.com", auth.hash_password("secret"), "English", 30, "Other")
+        await client.post("/api/login", json={"email": "bench@example.com", "password": "secret"})
+
+        done = asyncio.Event()
+        chat_latencies = []
+
+        async def chat_probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                res = await client.post("/api/chat", json={"message": "I have a fever"}, headers=headers)
+                res.raise_for_status()
+                chat_latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.01)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def login():
+            async with semaphore:
+                res = await client.post("/api/login", json={"email": "bench@example.com", "password": "secret"})
+                res.raise_for_status()
+
+        probe = asyncio.create_task(chat_probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe
+
+    chat = summarize(chat_latencies, elapsed)
+    return {
+        "password_workers": auth.PASSWORD_WORKERS,
+        "logins_per_s": round(args.logins / elapsed, 1),
+        "chat_p50_ms": chat["p50_ms"],
+        "chat_p99_ms": chat["p99_ms"],
+        "chat_samples": chat["requests"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_child(args))))
+        return
+
+    cores = os.cpu_count() or 1
+    results = []
+    for workers in sorted({1, 2, 4, cores}):
+        if workers > cores:
+            continue
+        env = dict(os.environ, PASSWORD_WORKERS=str(workers))
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.login_load", "--child",
+             "--logins", str(args.logins), "--concurrency", str(args.concurrency)],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
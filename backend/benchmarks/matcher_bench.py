@@ -0,0 +1,77 @@
+"""Per-message matching latency: legacy substring scan vs PhraseMatcher.
+
+Run from the backend directory:
+    python -m benchmarks.matcher_bench
+"""
+import json
+import random
+import string
+import time
+
+from bot import PHRASE_TYPES, build_matcher, phrases_dict
+from knowledge_base import knowledge_base_store
+
+knowledge_base = knowledge_base_store.data
+
+SIZES = [len(knowledge_base), 300, 1000, 10000, 30000]
+MESSAGES = [
+    "hi there, i have had a bad headache and a fever since yesterday",
+    "my stomach ache is getting worse after dinner and i feel nauseous",
+    "i think i cut my finger while cooking, it is bleeding a bit",
+    "nothing much, just wanted to say thanks for the help yesterday",
+]
+
+
+def synthetic_knowledge_base(size):
+    rng = random.Random(size)
+    kb = dict(knowledge_base)
+    while len(kb) < size:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(rng.randint(1, 3))]
+        kb[" ".join(words)] = {"symptoms": [], "advice": []}
+    return kb
+
+
+def legacy_scan(kb, message):
+    phrase_types = [t for t in PHRASE_TYPES if any(w in message for w in phrases_dict[t]["keywords"])]
+    conditions = [c for c in kb if c in message]
+    return phrase_types, conditions
+
+
+def matcher_scan(matcher, message):
+    return list(matcher.search(message))
+
+
+def per_call_us(fn, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        rounds = 0
+        start = time.perf_counter()
+        while True:
+            for message in MESSAGES:
+                fn(*args, message)
+            rounds += len(MESSAGES)
+            elapsed = time.perf_counter() - start
+            if elapsed > 0.05:
+                break
+        best = min(best, elapsed / rounds)
+    return best * 1e6
+
+
+def main():
+    results = []
+    for size in SIZES:
+        kb = synthetic_knowledge_base(size)
+        start = time.perf_counter()
+        matcher = build_matcher(kb)
+        build_ms = (time.perf_counter() - start) * 1000
+        results.append({
+            "conditions": size,
+            "build_ms": round(build_ms, 2),
+            "legacy_us_per_message": round(per_call_us(legacy_scan, kb), 2),
+            "matcher_us_per_message": round(per_call_us(matcher_scan, matcher), 2),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
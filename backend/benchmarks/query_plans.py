@@ -0,0 +1,77 @@
+"""Checks that the hot history/feedback queries are served by indexes.
+
+Run from the backend directory (exits non-zero if any query scans a table):
+    python -m benchmarks.query_plans
+"""
+import os
+import sys
+import tempfile
+
+os.environ["DB_NAME"] = os.path.join(tempfile.mkdtemp(prefix="wellbot-plans-"), "plans.db")
+
+import db  # noqa: E402
+
+QUERIES = {
+    "get_chats": ("SELECT message, response, timestamp, id FROM chats WHERE user_id=? AND id<? ORDER BY id DESC LIMIT ?", (1, 100, 50)),
+    "get_chats_after": ("SELECT message, response, timestamp, id FROM chats WHERE user_id=? AND id>? ORDER BY id ASC LIMIT ?", (1, 100, 50)),
+    "get_chats_archive": ("SELECT message, response, timestamp, id FROM archive.chats WHERE user_id=? AND id<? ORDER BY id DESC LIMIT ?", (1, 100, 50)),
+    "clear_chats/delete_user": ("DELETE FROM chats WHERE user_id=?", (1,)),
+    "clear_chats_archive": ("DELETE FROM archive.chats WHERE user_id=?", (1,)),
+    "retention_expired": ("SELECT id FROM chats WHERE timestamp < ? ORDER BY timestamp LIMIT ?", ("2025-01-01", 500)),
+    "retention_over_limit": ("""
+        SELECT id FROM chats WHERE user_id=? AND id <= (
+            SELECT id FROM chats WHERE user_id=? ORDER BY id DESC LIMIT 1 OFFSET ?
+        ) ORDER BY id LIMIT ?
+    """, (1, 1, 1000, 500)),
+    "retention_users": ("SELECT user_id FROM chats GROUP BY user_id HAVING COUNT(*) > ?", (1000,)),
+    "purge_user_chats": ("DELETE FROM chats WHERE id IN (SELECT id FROM chats WHERE user_id=? LIMIT ?)", (1, 200)),
+    "purge_user_feedbacks": ("DELETE FROM feedbacks WHERE id IN (SELECT id FROM feedbacks WHERE user_id=? LIMIT ?)", (1, 200)),
+    "iter_feedbacks": ("SELECT id, rating, review, timestamp FROM feedbacks WHERE user_id=? ORDER BY timestamp ASC, id ASC", (1,)),
+    "get_feedbacks": ("SELECT rating, review, timestamp FROM feedbacks WHERE user_id=? ORDER BY timestamp DESC", (1,)),
+    "daily_chats": ("""
+        SELECT date(timestamp) AS day, COUNT(*) FROM chats
+        WHERE timestamp >= ? AND timestamp < date(?, '+1 day') GROUP BY day
+    """, ("2025-01-01", "2025-01-31")),
+    "daily_chats_archive": ("""
+        SELECT date(timestamp) AS day, COUNT(*) FROM archive.chats
+        WHERE timestamp >= ? AND timestamp < date(?, '+1 day') GROUP BY day
+    """, ("2025-01-01", "2025-01-31")),
+    "latest_reviews": ("""
+        SELECT users.username, feedbacks.rating, feedbacks.review, feedbacks.timestamp, feedbacks.id
+        FROM feedbacks
+        JOIN users ON feedbacks.user_id = users.id
+        WHERE 1=1
+        ORDER BY feedbacks.timestamp DESC, feedbacks.id DESC LIMIT ?
+    """, (3,)),
+    "get_all_feedbacks_page": ("""
+        SELECT users.username, feedbacks.rating, feedbacks.review, feedbacks.timestamp, feedbacks.id
+        FROM feedbacks
+        JOIN users ON feedbacks.user_id = users.id
+        WHERE 1=1 AND (feedbacks.timestamp, feedbacks.id) < (?, ?) AND lower(feedbacks.rating) = ?
+        ORDER BY feedbacks.timestamp DESC, feedbacks.id DESC LIMIT ?
+    """, ("2025-01-01 00:00:00", 100, "positive", 50)),
+}
+
+
+def query_plan(conn, sql, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def main():
+    db.init_db()
+    failures = 0
+    with db.connection() as conn:
+        print(f"schema version {db.schema_version(conn)}")
+        for name, (sql, params) in QUERIES.items():
+            plan = query_plan(conn, sql, params)
+            uses_index = not any(step.startswith("SCAN") and "INDEX" not in step for step in plan)
+            sorts = any("TEMP B-TREE FOR ORDER BY" in step for step in plan)
+            ok = uses_index and not sorts
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name}: {' | '.join(plan)}")
+    db.close_connections()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
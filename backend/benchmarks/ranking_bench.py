@@ -0,0 +1,78 @@
+"""Symptom ranking latency: full rebuild, incremental edit and per-message scoring.
+
+Run from the backend directory:
+    python -m benchmarks.ranking_bench
+"""
+import json
+import random
+import string
+import time
+
+from knowledge_base import knowledge_base_store
+from ranking import SymptomRanker
+
+knowledge_base = knowledge_base_store.data
+
+SIZES = [len(knowledge_base), 1000, 10000, 30000]
+MESSAGES = [
+    "i have chills and body aches since last night",
+    "my throat is tickling and i have a dry cough",
+    "i feel bloated and nauseous with cramps after dinner",
+    "nothing much, just wanted to say thanks for the help yesterday",
+]
+
+
+def synthetic_knowledge_base(size):
+    rng = random.Random(size)
+    vocabulary = sorted({word for info in knowledge_base.values() for s in info.get("symptoms", []) for word in s.split()})
+    vocabulary += ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(size // 2)]
+    kb = dict(knowledge_base)
+    while len(kb) < size:
+        symptoms = [" ".join(rng.choices(vocabulary, k=rng.randint(1, 3))) for _ in range(rng.randint(2, 6))]
+        kb[f"condition {len(kb)}"] = {"symptoms": symptoms, "advice": []}
+    return kb
+
+
+def per_call_us(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        rounds = 0
+        start = time.perf_counter()
+        while True:
+            for message in MESSAGES:
+                fn(message)
+            rounds += len(MESSAGES)
+            elapsed = time.perf_counter() - start
+            if elapsed > 0.05:
+                break
+        best = min(best, elapsed / rounds)
+    return best * 1e6
+
+
+def main():
+    results = []
+    for size in SIZES:
+        kb = synthetic_knowledge_base(size)
+        start = time.perf_counter()
+        ranker = SymptomRanker().sync(kb)
+        ranker.rank(MESSAGES[0])
+        build_ms = (time.perf_counter() - start) * 1000
+
+        edited = dict(kb)
+        edited["condition edited"] = {"symptoms": ["chills", "night sweats"], "advice": []}
+        start = time.perf_counter()
+        ranker.sync(edited)
+        ranker.rank(MESSAGES[0])
+        edit_ms = (time.perf_counter() - start) * 1000
+
+        results.append({
+            "conditions": size,
+            "build_ms": round(build_ms, 2),
+            "incremental_edit_ms": round(edit_ms, 2),
+            "rank_us_per_message": round(per_call_us(ranker.rank), 2),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
+import asyncio
+import functools
 import random
-from knowledge_base import load_knowledge_base
+from context_store import create_context_store
+from knowledge_base import knowledge_base_store
+from matcher import PhraseMatcher
+from metrics import STAGE_SECONDS, timed
+from response_templates import TEMPLATE_WARM_UP_TIMEOUT, render_sections, template_translations
 from translator import translator
 
-knowledge_base = load_knowledge_base()
-
 phrases_dict = {
     "greetings": {
         "keywords": ["hi", "hieee", "hello", "hey", "good morning", "good evening", "good afternoon", "what's up", "howdy"],
@@ -32,43 +36,96 @@ LANG_NAME_TO_CODE = {
     "hindi": "hi"
 }
 
-conversation_context = {}
+PHRASE_TYPES = ["greetings", "thanks", "okay"]
 
+conversation_context = create_context_store()
 
-def wellness_response(message, language="English", user_id=None):
-    lang_code = LANG_NAME_TO_CODE.get(language.lower(), "en")
 
-    english_message = message
-    if lang_code != "en":
-        english_message = translator.translate_text(message, "en")
-    english_message = english_message.lower().strip()
+def build_matcher(kb):
+    entries = []
+    for phrase_type in PHRASE_TYPES:
+        for keyword in phrases_dict[phrase_type]["keywords"]:
+            entries.append((keyword, ("phrase", phrase_type)))
+    for condition in kb:
+        entries.append((condition, ("condition", condition)))
+    return PhraseMatcher(entries)
+
+
+knowledge_base_store.register_derived("matcher", build_matcher, fields=())
+
+symptom_ranker = None
+
+
+def build_ranker(kb):
+    """Syncs the symptom ranker, creating it (and importing NumPy) the first time a snapshot is built"""
+    global symptom_ranker
+    if symptom_ranker is None:
+        from ranking import SymptomRanker
+        symptom_ranker = SymptomRanker()
+    return symptom_ranker.sync(kb)
+
+
+knowledge_base_store.register_derived("ranker", build_ranker, fields=("symptoms",))
+
+
+def build_sections(kb):
+    return template_translations.retain(render_sections(kb))
+
 
-    for phrase_type in ["greetings", "thanks", "okay"]:
-        keywords = phrases_dict[phrase_type]["keywords"]
-        responses = phrases_dict[phrase_type]["responses"]
-        if any(word in english_message for word in keywords):
-            return translator.translate_response(random.choice(responses), lang_code)
+knowledge_base_store.register_derived("sections", build_sections, fields=("advice",))
+_warm_up_lock = asyncio.Lock()
 
-    matched_conditions = []
-    for condition, info in knowledge_base.items():
-        if condition in english_message:
-            matched_conditions.append(condition)
+
+async def warm_up_templates():
+    """Pre-translates every condition section that has no stored translation yet"""
+    async with _warm_up_lock:
+        return await template_translations.warm_up(
+            knowledge_base_store.snapshot.derived["sections"],
+            LANG_NAME_TO_CODE.values(),
+            functools.partial(translator.translate_batch_async, timeout=TEMPLATE_WARM_UP_TIMEOUT, fallback=False),
+        )
+
+
+def scan_message(english_message, matcher):
+    """Returns the matched phrase types and conditions (in message order)"""
+    phrase_types = set()
+    conditions = []
+    for _, _, (kind, value) in matcher.search(english_message):
+        if kind == "phrase":
+            phrase_types.add(value)
+        elif value not in conditions:
+            conditions.append(value)
+    return phrase_types, conditions
+
+
+def english_reply(english_message, user_id=None):
+    """Builds the English reply for an already translated message"""
+    return join_sections(english_reply_sections(english_message, user_id))
+
+
+def english_reply_sections(english_message, user_id=None):
+    """Builds the English reply as a list of sections, one per matched condition"""
+    english_message = " ".join(english_message.lower().split())
+    snapshot = knowledge_base_store.snapshot
+    knowledge_base = snapshot.data
+    phrase_types, matched_conditions = scan_message(english_message, snapshot.derived["matcher"])
+    if not phrase_types and not matched_conditions:
+        matched_conditions = [name for name, _ in snapshot.derived["ranker"].rank(english_message)]
+
+    for phrase_type in PHRASE_TYPES:
+        if phrase_type in phrase_types:
+            responses = phrases_dict[phrase_type]["responses"]
+            return [random.choice(responses)]
 
     if matched_conditions:
-        combined_response = []
-        for condition in matched_conditions:
-            info = knowledge_base.get(condition)
-            if info:
-                section = f"It seems like you might be experiencing {condition.capitalize()}.\nHere’s some advice that may help:\n"
-                for advice in info.get("advice", []):
-                    section += f"- {advice}\n"
-                combined_response.append(section)
-
-        final_message = "\n".join(combined_response)
-        return translator.translate_response(final_message.strip(), lang_code)
-
-    if user_id in conversation_context and conversation_context[user_id].get("symptom"):
-        symptom = conversation_context[user_id]["symptom"]
+        sections = snapshot.derived["sections"]
+        combined_response = [sections[condition] for condition in matched_conditions if condition in sections]
+        if combined_response:
+            return combined_response
+
+    context = conversation_context.get(user_id)
+    if context and context.get("symptom"):
+        symptom = context["symptom"]
         info = knowledge_base.get(symptom)
         if info:
             followup = (
@@ -76,18 +133,116 @@ def wellness_response(message, language="English", user_id=None):
                 f"Here’s some advice that may help:\n" +
                 "\n".join(f"- {a}" for a in info.get("advice", []))
             )
-            conversation_context.pop(user_id, None)
-            return translator.translate_response(followup, lang_code)
+            conversation_context.pop(user_id)
+            return [followup]
 
-    for condition, info in knowledge_base.items():
-        if condition in english_message:
-            conversation_context[user_id] = {"symptom": condition}
+    for condition in matched_conditions:
+        info = knowledge_base.get(condition)
+        if info:
+            conversation_context.set(user_id, {"symptom": condition})
             question = f"I see you mentioned {condition}. How are you feeling right now? Are your {', '.join(info['symptoms'][:2])} severe?"
-            return translator.translate_response(question, lang_code)
+            return [question]
 
     non_health_responses = [
         "I can help you with health-related queries. Please tell me about your symptoms.",
         "Please ask me something related to your health or wellness.",
         "I'm designed to help with health concerns — could you share how you're feeling?"
     ]
-    return translator.translate_response(random.choice(non_health_responses), lang_code)
+    return [random.choice(non_health_responses)]
+
+
+def join_sections(sections):
+    return "\n".join(sections).strip()
+
+
+def pretranslated(sections, lang_code):
+    """Joins the stored translations of the sections, or returns None if any has to be translated live"""
+    translated = [template_translations.get(section, lang_code) for section in sections]
+    if not translated or None in translated:
+        return None
+    return "\n\n".join(translated)
+
+
+def wellness_response(message, language="English", user_id=None):
+    lang_code = LANG_NAME_TO_CODE.get(language.lower(), "en")
+
+    english_message = message
+    if lang_code != "en":
+        with timed(STAGE_SECONDS, stage="translate_inbound"):
+            english_message = translator.translate_text(message, "en")
+
+    with timed(STAGE_SECONDS, stage="match"):
+        sections = english_reply_sections(english_message, user_id)
+    with timed(STAGE_SECONDS, stage="translate_outbound"):
+        ready = pretranslated(sections, lang_code)
+        if ready is not None:
+            return ready
+        return translator.translate_response(join_sections(sections), lang_code)
+
+
+async def wellness_response_async(message, language="English", user_id=None):
+    lang_code = LANG_NAME_TO_CODE.get(language.lower(), "en")
+
+    english_message = message
+    if lang_code != "en":
+        with timed(STAGE_SECONDS, stage="translate_inbound"):
+            english_message = await translator.translate_text_async(message, "en")
+
+    with timed(STAGE_SECONDS, stage="match"):
+        sections = english_reply_sections(english_message, user_id)
+    with timed(STAGE_SECONDS, stage="translate_outbound"):
+        ready = pretranslated(sections, lang_code)
+        if ready is not None:
+            return ready
+        return await translator.translate_response_async(join_sections(sections), lang_code)
+
+
+async def wellness_responses_batch_async(messages, language="English", user_id=None):
+    """Answers messages in order (so follow-ups see earlier context) with batched translation"""
+    lang_code = LANG_NAME_TO_CODE.get(language.lower(), "en")
+
+    english_messages = messages
+    if lang_code != "en":
+        with timed(STAGE_SECONDS, stage="translate_inbound"):
+            english_messages = await translator.translate_batch_async(messages, "en")
+
+    with timed(STAGE_SECONDS, stage="match"):
+        replies = [english_reply_sections(message, user_id) for message in english_messages]
+    with timed(STAGE_SECONDS, stage="translate_outbound"):
+        results = [pretranslated(sections, lang_code) for sections in replies]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            translated = await translator.translate_batch_async([join_sections(replies[i]) for i in missing], lang_code)
+            for i, result in zip(missing, translated):
+                results[i] = result
+        return results
+
+
+async def wellness_response_stream(message, language="English", user_id=None):
+    """Yields translated reply sections in order, each as soon as its translation is ready"""
+    lang_code = LANG_NAME_TO_CODE.get(language.lower(), "en")
+
+    english_message = message
+    if lang_code != "en":
+        with timed(STAGE_SECONDS, stage="translate_inbound"):
+            english_message = await translator.translate_text_async(message, "en")
+
+    with timed(STAGE_SECONDS, stage="match"):
+        sections = english_reply_sections(english_message, user_id)
+    pending = []
+    for section in sections:
+        ready = template_translations.get(section, lang_code)
+        if ready is not None:
+            task = asyncio.get_running_loop().create_future()
+            task.set_result(ready)
+        else:
+            task = asyncio.ensure_future(translator.translate_response_async(section.strip(), lang_code))
+        pending.append(task)
+    try:
+        for task in pending:
+            with timed(STAGE_SECONDS, stage="translate_outbound"):
+                section = await task
+            yield section
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,195 @@
+import asyncio
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+
+from models import add_chats, delete_chats_by_id, get_chats, insert_chat_rows, iter_chats
+
+CHAT_WRITE_BEHIND = os.getenv("CHAT_WRITE_BEHIND", "0").lower() in ("1", "true", "yes")
+CHAT_QUEUE_SIZE = int(os.getenv("CHAT_QUEUE_SIZE", "1000"))
+CHAT_FLUSH_BATCH = int(os.getenv("CHAT_FLUSH_BATCH", "200"))
+CHAT_FLUSH_INTERVAL = float(os.getenv("CHAT_FLUSH_INTERVAL", "0.05"))
+CHAT_FLUSH_RETRIES = int(os.getenv("CHAT_FLUSH_RETRIES", "5"))
+
+logger = logging.getLogger(__name__)
+
+
+class ChatLog:
+    """Chat persistence with an optional write-behind queue and group commit.
+
+    When running, turns are queued (awaiting when the queue is full) and a background task
+    inserts them in batches of up to `batch_size` rows or every `interval` seconds. Turns that
+    are queued but not yet committed are merged into reads so users always see their own writes.
+
+    The lock only guards the pending rows; database reads and writes happen outside it so the
+    event loop never waits on a flush. A batch that still fails after `retries` attempts is
+    logged and dropped.
+    """
+
+    def __init__(self, maxsize=CHAT_QUEUE_SIZE, batch_size=CHAT_FLUSH_BATCH, interval=CHAT_FLUSH_INTERVAL,
+                 retries=CHAT_FLUSH_RETRIES):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retries = retries
+        self.dropped = 0
+        self._queue = None
+        self._task = None
+        self._pending = {}
+        self._flushing = set()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops accepting queued writes and flushes everything still pending"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        await self._queue.put(None)
+        await task
+
+    async def record(self, user_id, message, response):
+        await self.record_many(user_id, [(message, response)])
+
+    async def record_many(self, user_id, turns):
+        if not self.running:
+            add_chats(user_id, turns)
+            return
+        timestamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        for message, response in turns:
+            row = (user_id, message, response, timestamp)
+            with self._lock:
+                self._pending.setdefault(user_id, []).append(row)
+            await self._queue.put(row)
+
+    def get_chats(self, user_id, before_id=None, limit=None):
+        """models.get_chats plus this user's unflushed turns on the newest page.
+
+        Unflushed turns have no id yet and do not count towards `limit`, so the page always
+        keeps its committed rows and the oldest of them still works as the next cursor.
+        """
+        chats = get_chats(user_id, before_id=before_id, limit=limit)
+        if before_id is None:
+            with self._lock:
+                pending = list(self._pending.get(user_id, ()))
+                flushing = {id(row) for row in pending if id(row) in self._flushing}
+            if flushing:
+                # A row committed by a flush that finished during the read is already in `chats`
+                committed = {chat[:3] for chat in chats}
+                pending = [row for row in pending if id(row) not in flushing or row[1:] not in committed]
+            chats.extend((message, response, timestamp, None) for _, message, response, timestamp in pending)
+        return chats
+
+    def iter_chats(self, user_id):
+        yield from iter_chats(user_id)
+        with self._lock:
+            pending = self._pending_rows(user_id)
+        yield from pending
+
+    def forget(self, user_id):
+        """Drops a user's unflushed turns, e.g. before their history is cleared"""
+        with self._lock:
+            self._pending.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            pending = sum(len(rows) for rows in self._pending.values())
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "pending": pending,
+            "dropped": self.dropped,
+        }
+
+    def _pending_rows(self, user_id):
+        return [(message, response, timestamp, None) for _, message, response, timestamp in self._pending.get(user_id, [])]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            row = await self._queue.get()
+            batch = []
+            if row is None:
+                stopping = True
+            else:
+                batch.append(row)
+            deadline = loop.time() + self.interval
+            while not stopping and len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                else:
+                    batch.append(row)
+            if stopping:
+                while not self._queue.empty():
+                    row = self._queue.get_nowait()
+                    if row is not None:
+                        batch.append(row)
+            if batch:
+                await self._flush_with_retry(batch)
+
+    async def _flush_with_retry(self, batch):
+        loop = asyncio.get_running_loop()
+        delay = self.interval
+        for attempt in range(1, self.retries + 1):
+            try:
+                await loop.run_in_executor(None, self._flush, batch)
+                return
+            except sqlite3.Error:
+                if attempt == self.retries:
+                    break
+                logger.exception("Chat write-behind flush of %d rows failed; retrying", len(batch))
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5)
+        logger.error("Chat write-behind flush of %d rows failed %d times; dropping them", len(batch), self.retries)
+        self.dropped += len(batch)
+        with self._lock:
+            for row in batch:
+                self._remove_pending(row)
+
+    def _flush(self, batch):
+        with self._lock:
+            live = [row for row in batch if any(r is row for r in self._pending.get(row[0], ()))]
+            self._flushing.update(id(row) for row in live)
+        try:
+            chat_ids = insert_chat_rows(live)
+        finally:
+            with self._lock:
+                self._flushing.difference_update(id(row) for row in live)
+        forgotten = []
+        with self._lock:
+            for row, chat_id in zip(live, chat_ids):
+                if not self._remove_pending(row):
+                    forgotten.append(chat_id)
+        if forgotten:
+            # forget() ran while these were being inserted, so the user's clear must still win
+            delete_chats_by_id(forgotten)
+
+    def _remove_pending(self, row):
+        """Removes row from the pending rows; returns False if it was no longer there"""
+        rows = self._pending.get(row[0])
+        if rows is None or not any(r is row for r in rows):
+            return False
+        rows[:] = [r for r in rows if r is not row]
+        if not rows:
+            del self._pending[row[0]]
+        return True
+
+chat_log = ChatLog()
@@ -0,0 +1,118 @@
+import abc
+import json
+import os
+import time
+
+from cache import LRUCache
+from db import connection
+
+CONTEXT_STORE = os.getenv("CONTEXT_STORE", "memory").lower()
+CONTEXT_MAX_USERS = int(os.getenv("CONTEXT_MAX_USERS", "10000"))
+CONTEXT_TTL = float(os.getenv("CONTEXT_TTL", "1800"))
+
+
+class ConversationContextStore(abc.ABC):
+    """Per-user conversation state (e.g. the symptom awaiting a follow-up)."""
+
+    @abc.abstractmethod
+    def get(self, user_id):
+        pass
+
+    @abc.abstractmethod
+    def set(self, user_id, context):
+        pass
+
+    @abc.abstractmethod
+    def pop(self, user_id):
+        pass
+
+    @abc.abstractmethod
+    def stats(self):
+        """Returns a JSON-serializable summary for the admin cache-stats endpoint"""
+
+
+class MemoryContextStore(ConversationContextStore):
+    """Process-local LRU+TTL store; holds at most `maxsize` users."""
+
+    def __init__(self, maxsize=CONTEXT_MAX_USERS, ttl=CONTEXT_TTL):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, user_id):
+        if user_id is None:
+            return None
+        return self._cache.get(user_id)
+
+    def set(self, user_id, context):
+        if user_id is not None:
+            self._cache.set(user_id, context)
+
+    def pop(self, user_id):
+        if user_id is not None:
+            self._cache.delete(user_id)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class SQLiteContextStore(ConversationContextStore):
+    """Store in the conversation_context table, shared by every worker using the same database.
+
+    Expired rows are ignored on read and purged every `purge_every` writes, which also trims
+    the table to the `maxsize` most recently updated users.
+    """
+
+    def __init__(self, maxsize=CONTEXT_MAX_USERS, ttl=CONTEXT_TTL, purge_every=500):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._writes = 0
+
+    def get(self, user_id):
+        if user_id is None:
+            return None
+        with connection() as conn:
+            row = conn.execute(
+                "SELECT context FROM conversation_context WHERE user_id=? AND expires_at>?",
+                (user_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, user_id, context):
+        if user_id is None:
+            return
+        with connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO conversation_context (user_id, context, expires_at) VALUES (?, ?, ?)",
+                (user_id, json.dumps(context), time.time() + self.ttl)
+            )
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            self.purge()
+
+    def pop(self, user_id):
+        if user_id is None:
+            return
+        with connection() as conn:
+            conn.execute("DELETE FROM conversation_context WHERE user_id=?", (user_id,))
+
+    def purge(self):
+        with connection() as conn:
+            conn.execute("DELETE FROM conversation_context WHERE expires_at<=?", (time.time(),))
+            conn.execute("""
+                DELETE FROM conversation_context WHERE user_id IN (
+                    SELECT user_id FROM conversation_context ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.maxsize,))
+
+    def stats(self):
+        with connection() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM conversation_context").fetchone()[0]
+        return {"size": size, "maxsize": self.maxsize}
+
+
+def create_context_store(kind=CONTEXT_STORE):
+    if kind == "sqlite":
+        return SQLiteContextStore()
+    if kind == "memory":
+        return MemoryContextStore()
+    raise ValueError(f"Unknown CONTEXT_STORE {kind!r}; expected 'memory' or 'sqlite'")
@@ -1,14 +1,189 @@
+import logging
 import sqlite3
 import os
+import threading
+import weakref
+from contextlib import contextmanager
 
 DB_NAME = os.getenv("DB_NAME", "wellness_chatbot.db")
+DB_ARCHIVE_NAME = os.getenv("DB_ARCHIVE_NAME", os.path.splitext(DB_NAME)[0] + "_archive.db")
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+
+_local = threading.local()
+_pool = set()
+_pool_lock = threading.Lock()
+_generation = 0
+
+logger = logging.getLogger(__name__)
+
+
+def _configure(conn):
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    _attach_archive(conn)
+    return conn
+
+
+def _attach_archive(conn):
+    """Attaches the chat archive as `archive`, creating its schema on first use"""
+    conn.execute("ATTACH DATABASE ? AS archive", (DB_ARCHIVE_NAME,))
+    conn.execute("PRAGMA archive.journal_mode=WAL")
+    conn.execute("PRAGMA archive.synchronous=NORMAL")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS archive.chats (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        message TEXT,
+        response TEXT,
+        timestamp DATETIME
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_chats_user_id ON chats(user_id, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_chats_timestamp ON chats(timestamp)")
+    conn.commit()
+
 
 def get_connection():
-    return sqlite3.connect(DB_NAME, check_same_thread=False)
+    """Opens a new tuned connection that the caller must close"""
+    conn = sqlite3.connect(DB_NAME, check_same_thread=False, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+    return _configure(conn)
+
+
+class _ThreadConnection:
+    """A thread's pooled connection; closed and dropped from the pool once the thread is gone"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.depth = 0
+        self.generation = _generation
+        with _pool_lock:
+            _pool.add(conn)
+        weakref.finalize(self, _discard, conn)
+
+
+def _discard(conn):
+    with _pool_lock:
+        _pool.discard(conn)
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+@contextmanager
+def connection():
+    """Borrows this thread's pooled connection, committing on success and rolling back on error"""
+    holder = getattr(_local, "holder", None)
+    if holder is None or holder.generation != _generation:
+        holder = _local.holder = _ThreadConnection(get_connection())
+    conn = holder.conn
+    holder.depth += 1
+    try:
+        yield conn
+        if holder.depth == 1:
+            conn.commit()
+    except BaseException:
+        if holder.depth == 1:
+            conn.rollback()
+        raise
+    finally:
+        holder.depth -= 1
+
+
+def close_connections():
+    """Closes every pooled connection; threads reconnect on their next borrow"""
+    global _generation
+    with _pool_lock:
+        _generation += 1
+        conns = list(_pool)
+        _pool.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
 
 def init_db():
-    conn = get_connection()
-    cursor = conn.cursor()
+    with connection() as conn:
+        enable_incremental_vacuum(conn)
+        migrate(conn)
+
+
+def enable_incremental_vacuum(conn):
+    """Switches the main database to auto_vacuum=INCREMENTAL if that needs no real work.
+
+    Once the file exists the setting only takes effect through a full VACUUM. That is instant
+    for a database with no tables yet, but on a populated one it rewrites the whole file and
+    holds the write lock throughout, so startup leaves it to `convert_to_incremental_vacuum`
+    and only logs that it is pending. Returns True if incremental vacuum is enabled.
+    """
+    if conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] == 2:
+        return True
+    conn.commit()
+    conn.execute("PRAGMA main.auto_vacuum=INCREMENTAL")
+    if conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] == 2:
+        return True
+    if conn.execute("SELECT COUNT(*) FROM main.sqlite_master").fetchone()[0]:
+        logger.warning(
+            "%s does not use incremental vacuum; freed pages are not returned to the OS until "
+            "`python db.py enable-incremental-vacuum` is run during maintenance", DB_NAME
+        )
+        return False
+    try:
+        conn.execute("VACUUM main")
+    except sqlite3.OperationalError:
+        logger.warning("Skipping enabling incremental vacuum on %s; the database is busy", DB_NAME)
+        return False
+    return True
+
+
+def convert_to_incremental_vacuum():
+    """One-off maintenance: rewrites the main database with a full VACUUM so auto_vacuum=INCREMENTAL
+    takes effect. Blocks writers for the duration; run it while the API is stopped."""
+    with connection() as conn:
+        conn.commit()
+        conn.execute("PRAGMA main.auto_vacuum=INCREMENTAL")
+        if conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] != 2:
+            conn.execute("VACUUM main")
+        return conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] == 2
+
+
+def incremental_vacuum(max_pages):
+    """Returns up to max_pages free pages of the main database to the OS; returns pages freed"""
+    with connection() as conn:
+        before = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+        if before:
+            conn.execute(f"PRAGMA main.incremental_vacuum({int(max_pages)})").fetchall()
+        after = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+    return before - after
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Applies every migration newer than the database's PRAGMA user_version, one transaction each"""
+    conn.commit()
+    for version, migration in enumerate(MIGRATIONS, start=1):
+        if schema_version(conn) >= version:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if schema_version(conn) < version:
+                migration(conn.cursor())
+                conn.execute(f"PRAGMA user_version={version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+def _create_tables(cursor):
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS users (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -37,5 +212,111 @@ def init_db():
         timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY(user_id) REFERENCES users(id)
     )""")
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS translation_cache (
+        text_hash TEXT,
+        dest_lang TEXT,
+        translated TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY(text_hash, dest_lang)
+    )""")
+
+
+def _add_history_indexes(cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_chats_user_timestamp ON chats(user_id, timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_feedbacks_user_timestamp ON feedbacks(user_id, timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_feedbacks_timestamp ON feedbacks(timestamp)")
+
+
+def _add_chat_keyset_index(cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_chats_user_id ON chats(user_id, id)")
+
+
+def _add_stats_counters(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS stats_counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    )""")
+    cursor.execute("DELETE FROM stats_counters")
+    cursor.execute("INSERT INTO stats_counters (name, value) SELECT 'users', COUNT(*) FROM users")
+    cursor.execute("INSERT INTO stats_counters (name, value) SELECT 'chats', COUNT(*) FROM chats")
+    cursor.execute("INSERT INTO stats_counters (name, value) SELECT 'feedbacks', COUNT(*) FROM feedbacks")
+    cursor.execute("""
+    INSERT INTO stats_counters (name, value)
+    SELECT 'rating:' || lower(rating), COUNT(*) FROM feedbacks GROUP BY lower(rating)
+    """)
+    for table in ("users", "chats"):
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_count_insert AFTER INSERT ON {table} BEGIN
+            UPDATE stats_counters SET value = value + 1 WHERE name = '{table}';
+        END""")
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_count_delete AFTER DELETE ON {table} BEGIN
+            UPDATE stats_counters SET value = value - 1 WHERE name = '{table}';
+        END""")
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_feedbacks_count_insert AFTER INSERT ON feedbacks BEGIN
+        UPDATE stats_counters SET value = value + 1 WHERE name = 'feedbacks';
+        INSERT INTO stats_counters (name, value) VALUES ('rating:' || lower(NEW.rating), 1)
+            ON CONFLICT(name) DO UPDATE SET value = value + 1;
+    END""")
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_feedbacks_count_delete AFTER DELETE ON feedbacks BEGIN
+        UPDATE stats_counters SET value = value - 1 WHERE name = 'feedbacks';
+        UPDATE stats_counters SET value = value - 1 WHERE name = 'rating:' || lower(OLD.rating);
+    END""")
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_feedbacks_count_update AFTER UPDATE OF rating ON feedbacks BEGIN
+        UPDATE stats_counters SET value = value - 1 WHERE name = 'rating:' || lower(OLD.rating);
+        INSERT INTO stats_counters (name, value) VALUES ('rating:' || lower(NEW.rating), 1)
+            ON CONFLICT(name) DO UPDATE SET value = value + 1;
+    END""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_chats_timestamp ON chats(timestamp)")
+
+
+def _add_conversation_context(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS conversation_context (
+        user_id INTEGER PRIMARY KEY,
+        context TEXT,
+        expires_at REAL
+    )""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversation_context_expires ON conversation_context(expires_at)")
+
+
+def _add_pending_deletions(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS pending_deletions (
+        user_id INTEGER PRIMARY KEY,
+        requested_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )""")
+    for table in ("chats", "archive.chats", "feedbacks"):
+        cursor.execute(f"""
+        INSERT OR IGNORE INTO pending_deletions (user_id)
+        SELECT DISTINCT user_id FROM {table} WHERE user_id NOT IN (SELECT id FROM users)
+        """)
+
+
+def _drop_inbound_translations(cursor):
+    cursor.execute("DELETE FROM translation_cache WHERE dest_lang = 'en'")
+
+
+# Append only: a migration's position in this list is its schema version.
+MIGRATIONS = [
+    _create_tables,
+    _add_history_indexes,
+    _add_chat_keyset_index,
+    _add_stats_counters,
+    _add_conversation_context,
+    _add_pending_deletions,
+    _drop_inbound_translations,
+]
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["enable-incremental-vacuum"]:
+        sys.exit("usage: python db.py enable-incremental-vacuum")
+    sys.exit(0 if convert_to_incremental_vacuum() else 1)
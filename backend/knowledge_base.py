@@ -1,5 +1,159 @@
 import json
+import os
+import stat
+import tempfile
+import threading
+from pathlib import Path
 
-def load_knowledge_base(path="knowledge_base.json"):
-    with open(path, "r") as f:
-        return json.load(f)
\ No newline at end of file
+KNOWLEDGE_BASE_PATH = Path(__file__).parent / "knowledge_base.json"
+
+def load_knowledge_base(path=KNOWLEDGE_BASE_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json_atomic(path, data):
+    """Writes data to a temp file next to path and renames it over path, keeping path's mode"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp_path, stat.S_IMODE(path.stat().st_mode))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class KnowledgeBaseSnapshot:
+    """Immutable view of the knowledge base plus structures derived from it."""
+
+    def __init__(self, data, version, derived):
+        self.data = data
+        self.version = version
+        self.derived = derived
+
+
+class KnowledgeBaseStore:
+    """Holds the parsed knowledge base in memory and persists mutations atomically.
+
+    Readers take `store.snapshot` once and use it for the whole request; writers build
+    a new dict, write it to a temp file, rename it over the JSON file, and only then
+    swap in a new snapshot, so readers never see a half-applied edit. The file is read
+    and the derived structures are built on first access, not at import.
+    """
+
+    def __init__(self, path=KNOWLEDGE_BASE_PATH):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._builders = {}
+        self._snapshot = None
+
+    @property
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._swap(load_knowledge_base(self.path))
+                snapshot = self._snapshot
+        return snapshot
+
+    @property
+    def data(self):
+        return self.snapshot.data
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+    def register_derived(self, name, builder, fields=None):
+        """Registers builder(data) to be recomputed for every new snapshot.
+
+        `fields` names the entry fields the builder reads besides the condition names; an edit
+        that leaves the names and those fields alone reuses the previous result. None means
+        the builder depends on everything.
+        """
+        with self._lock:
+            self._builders[name] = (builder, fields)
+            current = self._snapshot
+            if current is None:
+                return
+            derived = dict(current.derived)
+            derived[name] = builder(current.data)
+            self._snapshot = KnowledgeBaseSnapshot(current.data, current.version, derived)
+
+    def resolve(self, name):
+        """Returns the stored key matching name case-insensitively, or None"""
+        data = self.snapshot.data
+        if name in data:
+            return name
+        lowered = name.lower()
+        for key in data:
+            if key.lower() == lowered:
+                return key
+        return None
+
+    def add(self, name, entry):
+        with self._lock:
+            if self.resolve(name) is not None:
+                raise ValueError(f"{name} already exists")
+            data = dict(self.snapshot.data)
+            data[name.lower()] = entry
+            self._commit(data, {name.lower()})
+
+    def update(self, name, entry):
+        with self._lock:
+            key = self.resolve(name)
+            if key is None:
+                raise KeyError(name)
+            data = dict(self.snapshot.data)
+            data[key] = entry
+            self._commit(data, {key})
+
+    def remove(self, name):
+        with self._lock:
+            key = self.resolve(name)
+            if key is None:
+                raise KeyError(name)
+            data = dict(self.snapshot.data)
+            del data[key]
+            self._commit(data, {key})
+
+    def reload(self):
+        with self._lock:
+            self._swap(load_knowledge_base(self.path))
+
+    def _commit(self, data, changed):
+        write_json_atomic(self.path, data)
+        self._swap(data, changed)
+
+    def _swap(self, data, changed=None):
+        """Publishes a snapshot of data; `changed` holds the keys that differ from the current one"""
+        previous = self._snapshot
+        derived = {}
+        for name, (builder, fields) in self._builders.items():
+            if changed is not None and previous is not None and name in previous.derived \
+                    and _unaffected(previous.data, data, changed, fields):
+                derived[name] = previous.derived[name]
+            else:
+                derived[name] = builder(data)
+        version = self._snapshot.version + 1 if self._snapshot is not None else 1
+        self._snapshot = KnowledgeBaseSnapshot(data, version, derived)
+
+
+def _unaffected(old, new, changed, fields):
+    if fields is None:
+        return False
+    return all(
+        key in old and key in new and all(old[key].get(field) == new[key].get(field) for field in fields)
+        for key in changed
+    )
+
+
+knowledge_base_store = KnowledgeBaseStore()
@@ -0,0 +1,241 @@
+import collections
+import functools
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILE_SLOW_REQUEST_MS = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.05"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+logger = logging.getLogger(__name__)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    """Renders a sample exactly; "%g" would round counters past a million to 6 digits"""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, [("le", f"{bound:g}")])
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key, [("le", "+Inf")])
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total:.6f}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Renders every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "wellbot_chat_stage_seconds", "Time spent in each stage of answering a chat message", ("stage",)
+)
+TRANSLATION_SECONDS = registry.histogram(
+    "wellbot_translation_seconds", "Translation latency by where the result came from", ("source",)
+)
+TRANSLATION_TIMEOUTS = registry.counter(
+    "wellbot_translation_timeouts_total", "Async translations that fell back to the offline backend after timing out"
+)
+TRANSLATION_FALLBACKS = registry.counter(
+    "wellbot_translation_fallbacks_total", "Translations served by the offline backend, by reason", ("reason",)
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "wellbot_db_query_seconds", "Latency of models.py queries", ("query",)
+)
+RATE_LIMITED = registry.counter(
+    "wellbot_rate_limited_total", "Requests rejected by a per-user rate limit or the concurrency cap", ("limit",)
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "wellbot_http_request_seconds", "HTTP request latency by route and method", ("route", "method", "status")
+)
+
+
+@contextmanager
+def timed(histogram, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+def timed_query(func):
+    """Records a models.py function's latency in DB_QUERY_SECONDS under its name"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with timed(DB_QUERY_SECONDS, query=func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class SlowRequestProfiler:
+    """Opt-in sampling profiler for slow requests.
+
+    For a random `sample_rate` fraction of requests a background thread snapshots the serving
+    thread's stack every `interval_ms`. If the request then takes at least `threshold_ms`, the
+    most frequent stacks are logged and kept in `reports`. Samples from an asyncio event loop
+    also include other requests interleaved on the same loop.
+    """
+
+    def __init__(self, threshold_ms=PROFILE_SLOW_REQUEST_MS, sample_rate=PROFILE_SAMPLE_RATE,
+                 interval_ms=PROFILE_INTERVAL_MS, top=10, keep=20):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.interval_ms = interval_ms
+        self.top = top
+        self.reports = collections.deque(maxlen=keep)
+
+    @property
+    def enabled(self):
+        return self.threshold_ms > 0 and self.sample_rate > 0
+
+    def should_sample(self):
+        return self.enabled and random.random() < self.sample_rate
+
+    @contextmanager
+    def profile(self, name):
+        target = threading.get_ident()
+        samples = collections.Counter()
+        stop = threading.Event()
+
+        def sample():
+            while not stop.wait(self.interval_ms / 1000):
+                frame = sys._current_frames().get(target)
+                stack = []
+                while frame is not None and len(stack) < 30:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                if stack:
+                    samples[" <- ".join(stack)] += 1
+
+        sampler = threading.Thread(target=sample, name="slow-request-profiler", daemon=True)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms >= self.threshold_ms:
+                report = {
+                    "request": name,
+                    "elapsed_ms": round(elapsed_ms, 2),
+                    "samples": sum(samples.values()),
+                    "top_stacks": [{"count": c, "stack": s} for s, c in samples.most_common(self.top)],
+                }
+                self.reports.append(report)
+                logger.warning("Slow request %s took %.1f ms; top stacks: %s", name, elapsed_ms, report["top_stacks"][:3])
+
+
+slow_request_profiler = SlowRequestProfiler()
+
+
+class StartupTimer:
+    """Wall-clock duration of each named startup phase, in the order they ran."""
+
+    def __init__(self):
+        self.phases = {}
+
+    def record(self, name, seconds):
+        self.phases[name] = round(seconds * 1000, 2)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def report(self):
+        return {"phases_ms": dict(self.phases), "total_ms": round(sum(self.phases.values()), 2)}
+
+
+startup_timer = StartupTimer()
@@ -1,126 +1,380 @@
-from db import get_connection
+import os
+import time
+from cache import LRUCache
+from db import connection, get_connection
+from metrics import timed_query
 
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+user_cache = LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+@timed_query
 def create_user(username, email, password, language, age, gender):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO users (username, email, password, language, age, gender) VALUES (?, ?, ?, ?, ?, ?)",
-        (username, email, password, language, age, gender)
-    )
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO users (username, email, password, language, age, gender) VALUES (?, ?, ?, ?, ?, ?)",
+            (username, email, password, language, age, gender)
+        )
 
+@timed_query
 def get_user_by_email(email):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE email=?", (email,))
-    user = cursor.fetchone()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE email=?", (email,))
+        user = cursor.fetchone()
+    return user
+
+def get_cached_user(user_id, email):
+    """Returns the user row for an authenticated request, served from user_cache when fresh"""
+    user = user_cache.get(user_id)
+    if user is not None and user[2] == email:
+        return user
+    user = get_user_by_email(email)
+    if user is not None:
+        user_cache.set(user[0], user)
     return user
 
+def invalidate_user(user_id):
+    user_cache.delete(user_id)
+
+@timed_query
 def update_user(user_id, username, language, age, gender):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE users SET username=?, language=?, age=?, gender=? WHERE id=?",
-        (username, language, age, gender, user_id)
-    )
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE users SET username=?, language=?, age=?, gender=? WHERE id=?",
+            (username, language, age, gender, user_id)
+        )
+    invalidate_user(user_id)
+
+@timed_query
+def update_password(user_id, password):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET password=? WHERE id=?", (password, user_id))
+    invalidate_user(user_id)
 
+@timed_query
 def add_chat(user_id, message, response):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO chats (user_id, message, response) VALUES (?, ?, ?)",
-        (user_id, message, response)
-    )
-    conn.commit()
-    conn.close()
-
-def get_chats(user_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT message, response, timestamp FROM chats WHERE user_id=? ORDER BY timestamp ASC",
-        (user_id,)
-    )
-    chats = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO chats (user_id, message, response) VALUES (?, ?, ?)",
+            (user_id, message, response)
+        )
+        return cursor.lastrowid
+
+@timed_query
+def add_chats(user_id, turns):
+    """Inserts (message, response) turns for one user in a single transaction"""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO chats (user_id, message, response) VALUES (?, ?, ?)",
+            [(user_id, message, response) for message, response in turns]
+        )
+
+@timed_query
+def insert_chat_rows(rows):
+    """Inserts (user_id, message, response, timestamp) rows for any users in a single transaction; returns their ids"""
+    with connection() as conn:
+        cursor = conn.cursor()
+        ids = []
+        for row in rows:
+            cursor.execute("INSERT INTO chats (user_id, message, response, timestamp) VALUES (?, ?, ?, ?)", row)
+            ids.append(cursor.lastrowid)
+        return ids
+
+@timed_query
+def delete_chats_by_id(chat_ids):
+    with connection() as conn:
+        conn.executemany("DELETE FROM chats WHERE id=?", [(chat_id,) for chat_id in chat_ids])
+
+@timed_query
+def get_chats(user_id, before_id=None, limit=None):
+    """Returns (message, response, timestamp, id) rows oldest first.
+
+    With a limit, only the newest `limit` rows older than `before_id` are returned,
+    so callers can page backwards using the id of the first row as the next cursor.
+    Rows moved to the archive database are read once the live rows run out.
+    """
+    with connection() as conn:
+        chats = _select_chats(conn, "chats", user_id, before_id, limit)
+        if limit is None or len(chats) < limit:
+            oldest = chats[-1][3] if chats else before_id
+            remaining = None if limit is None else limit - len(chats)
+            chats += _select_chats(conn, "archive.chats", user_id, oldest, remaining)
+    chats.reverse()
     return chats
 
-def delete_user(user_id):
+@timed_query
+def get_chats_after(user_id, after_id, limit=None):
+    """Returns (message, response, timestamp, id) rows newer than `after_id`, oldest first"""
+    query = "SELECT message, response, timestamp, id FROM chats WHERE user_id=? AND id>? ORDER BY id ASC"
+    params = [user_id, after_id]
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    with connection() as conn:
+        return conn.execute(query, params).fetchall()
+
+def _select_chats(conn, table, user_id, before_id, limit):
+    query = f"SELECT message, response, timestamp, id FROM {table} WHERE user_id=?"
+    params = [user_id]
+    if before_id is not None:
+        query += " AND id<?"
+        params.append(before_id)
+    query += " ORDER BY id DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return conn.execute(query, params).fetchall()
+
+def iter_chats(user_id, batch_size=500):
+    """Yields a user's chats oldest first (archived ones included) straight from cursors on a dedicated connection"""
     conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM chats WHERE user_id=?", (user_id,))
-    cursor.execute("DELETE FROM users WHERE id=?", (user_id,))
-    conn.commit()
-    conn.close()
+    try:
+        last_id = None
+        for table in ("archive.chats", "chats"):
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT message, response, timestamp, id FROM {table} WHERE user_id=? AND id>? ORDER BY id ASC",
+                (user_id, last_id if last_id is not None else -1)
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                last_id = rows[-1][3]
+                yield from rows
+    finally:
+        conn.close()
+
+@timed_query
+def archive_chats_before(cutoff, batch_size):
+    """Moves up to batch_size chats older than cutoff to the archive; returns rows moved"""
+    with connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        ids = [row[0] for row in conn.execute(
+            "SELECT id FROM chats WHERE timestamp < ? ORDER BY timestamp LIMIT ?", (cutoff, batch_size)
+        )]
+        return _move_to_archive(conn, ids)
+
+@timed_query
+def archive_user_chats_over(user_id, keep, batch_size):
+    """Moves up to batch_size of a user's oldest chats beyond their newest `keep` to the archive"""
+    with connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        ids = [row[0] for row in conn.execute("""
+            SELECT id FROM chats WHERE user_id=? AND id <= (
+                SELECT id FROM chats WHERE user_id=? ORDER BY id DESC LIMIT 1 OFFSET ?
+            ) ORDER BY id LIMIT ?
+        """, (user_id, user_id, keep, batch_size))]
+        return _move_to_archive(conn, ids)
+
+@timed_query
+def users_over_chat_limit(keep):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT user_id FROM chats GROUP BY user_id HAVING COUNT(*) > ?", (keep,))
+        return [row[0] for row in cursor.fetchall()]
 
+def _move_to_archive(conn, ids):
+    if not ids:
+        return 0
+    placeholders = ",".join("?" * len(ids))
+    conn.execute(f"""
+        INSERT OR REPLACE INTO archive.chats (id, user_id, message, response, timestamp)
+        SELECT id, user_id, message, response, timestamp FROM chats WHERE id IN ({placeholders})
+    """, ids)
+    moved = conn.execute(f"DELETE FROM chats WHERE id IN ({placeholders})", ids).rowcount
+    _add_archived_count(conn, moved)
+    return moved
+
+def _add_archived_count(conn, delta):
+    conn.execute("""
+        INSERT INTO stats_counters (name, value) VALUES ('archived_chats', ?)
+        ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+    """, (delta,))
+
+@timed_query
+def delete_user(user_id):
+    delete_users([user_id])
+
+@timed_query
+def delete_users(user_ids):
+    """Deletes account rows in one transaction and records the users in pending_deletions until purge_user_data has run"""
+    params = [(user_id,) for user_id in user_ids]
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("DELETE FROM users WHERE id=?", params)
+        cursor.executemany("INSERT OR IGNORE INTO pending_deletions (user_id) VALUES (?)", params)
+    for user_id in user_ids:
+        invalidate_user(user_id)
+
+@timed_query
+def get_pending_deletions():
+    with connection() as conn:
+        return [row[0] for row in conn.execute("SELECT user_id FROM pending_deletions ORDER BY requested_at, user_id")]
+
+def purge_user_data(user_id, batch_size=500, pause=0):
+    """Deletes a user's chats, archived chats and feedbacks, batch_size rows per transaction.
+
+    Returns the number of rows deleted. Small transactions keep the write lock free for
+    requests between batches, however much history the user has. The user's pending_deletions
+    entry is only removed once everything is gone, so an interrupted purge is resumed.
+    """
+    deleted = 0
+    for table in ("chats", "archive.chats", "feedbacks"):
+        while True:
+            count = _delete_user_rows(table, user_id, batch_size)
+            deleted += count
+            if count < batch_size:
+                break
+            time.sleep(pause)
+    with connection() as conn:
+        conn.execute("DELETE FROM pending_deletions WHERE user_id=?", (user_id,))
+    return deleted
+
+@timed_query
+def _delete_user_rows(table, user_id, batch_size):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE user_id=? LIMIT ?)",
+            (user_id, batch_size)
+        )
+        if table == "archive.chats" and cursor.rowcount:
+            _add_archived_count(conn, -cursor.rowcount)
+        return cursor.rowcount
+
+@timed_query
 def clear_chats(user_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM chats WHERE user_id=?", (user_id,))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM chats WHERE user_id=?", (user_id,))
+        cursor.execute("DELETE FROM archive.chats WHERE user_id=?", (user_id,))
+        _add_archived_count(conn, -cursor.rowcount)
 
+@timed_query
 def add_feedback(user_id, rating, review):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO feedbacks (user_id, rating, review) VALUES (?, ?, ?)",
-        (user_id, rating, review)
-    )
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO feedbacks (user_id, rating, review) VALUES (?, ?, ?)",
+            (user_id, rating, review)
+        )
 
+@timed_query
 def get_feedbacks(user_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT rating, review, timestamp FROM feedbacks WHERE user_id=? ORDER BY timestamp DESC",
-        (user_id,)
-    )
-    data = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT rating, review, timestamp FROM feedbacks WHERE user_id=? ORDER BY timestamp DESC",
+            (user_id,)
+        )
+        data = cursor.fetchall()
     return data
 
-def get_total_users():
+def iter_feedbacks(user_id, batch_size=500):
+    """Yields a user's (id, rating, review, timestamp) feedback rows oldest first from a dedicated connection"""
     conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM users")
-    total = cursor.fetchone()[0]
-    conn.close()
-    return total
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, rating, review, timestamp FROM feedbacks WHERE user_id=? ORDER BY timestamp ASC, id ASC",
+            (user_id,)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+@timed_query
+def get_stats_counters():
+    """Returns the maintained counters (users, chats, archived_chats, feedbacks, rating:<rating>)"""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name, value FROM stats_counters")
+        counters = dict(cursor.fetchall())
+    return counters
+
+def get_total_users():
+    return get_stats_counters().get("users", 0)
 
 def get_total_chats():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM chats")
-    total = cursor.fetchone()[0]
-    conn.close()
-    return total
+    counters = get_stats_counters()
+    return counters.get("chats", 0) + counters.get("archived_chats", 0)
 
 def get_total_feedbacks():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM feedbacks")
-    total = cursor.fetchone()[0]
-    conn.close()
-    return total
+    return get_stats_counters().get("feedbacks", 0)
 
-def get_all_feedbacks():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT users.username, feedbacks.rating, feedbacks.review, feedbacks.timestamp
+@timed_query
+def get_daily_activity(start_date, end_date):
+    """Returns per-day chat counts and feedback counts by rating for [start_date, end_date]"""
+    params = (start_date.isoformat(), end_date.isoformat())
+    with connection() as conn:
+        cursor = conn.cursor()
+        chat_counts = {}
+        for table in ("chats", "archive.chats"):
+            cursor.execute(f"""
+                SELECT date(timestamp) AS day, COUNT(*)
+                FROM {table}
+                WHERE timestamp >= ? AND timestamp < date(?, '+1 day')
+                GROUP BY day
+            """, params)
+            for day, count in cursor.fetchall():
+                chat_counts[day] = chat_counts.get(day, 0) + count
+        chats = sorted(chat_counts.items())
+        cursor.execute("""
+            SELECT date(timestamp) AS day, lower(rating), COUNT(*)
+            FROM feedbacks
+            WHERE timestamp >= ? AND timestamp < date(?, '+1 day')
+            GROUP BY day, lower(rating)
+        """, params)
+        feedbacks = cursor.fetchall()
+    return chats, feedbacks
+
+@timed_query
+def get_all_feedbacks(limit=None, before=None, rating=None, start_date=None, end_date=None):
+    """Returns feedback newest first.
+
+    `before` is a (timestamp, id) keyset cursor taken from the last row of the previous page;
+    `rating`, `start_date` and `end_date` (inclusive dates) narrow the listing.
+    """
+    query = """
+        SELECT users.username, feedbacks.rating, feedbacks.review, feedbacks.timestamp, feedbacks.id
         FROM feedbacks
         JOIN users ON feedbacks.user_id = users.id
-        ORDER BY feedbacks.timestamp DESC
-    """)
-    data = cursor.fetchall()
-    conn.close()
+        WHERE 1=1
+    """
+    params = []
+    if before is not None:
+        query += " AND (feedbacks.timestamp, feedbacks.id) < (?, ?)"
+        params.extend(before)
+    if rating:
+        query += " AND lower(feedbacks.rating) = ?"
+        params.append(rating.lower())
+    if start_date is not None:
+        query += " AND feedbacks.timestamp >= ?"
+        params.append(start_date.isoformat())
+    if end_date is not None:
+        query += " AND feedbacks.timestamp < date(?, '+1 day')"
+        params.append(end_date.isoformat())
+    query += " ORDER BY feedbacks.timestamp DESC, feedbacks.id DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        data = cursor.fetchall()
     return [
-        {"username": row[0], "rating": row[1], "review": row[2], "timestamp": row[3]}
+        {"id": row[4], "username": row[0], "rating": row[1], "review": row[2], "timestamp": row[3]}
         for row in data
     ]
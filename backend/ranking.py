@@ -0,0 +1,171 @@
+import math
+import os
+import re
+import threading
+
+import numpy as np
+
+SYMPTOM_MATCH_THRESHOLD = float(os.getenv("SYMPTOM_MATCH_THRESHOLD", "0.35"))
+SYMPTOM_MATCH_TOP_K = int(os.getenv("SYMPTOM_MATCH_TOP_K", "3"))
+
+STOPWORDS = frozenset(
+    "a an and are am as at be been but by do feel feeling for from had has have having i im i'm in is it its "
+    "me my of on or so some than that the their this to very was with".split()
+)
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lowercased word tokens without stopwords, with a trailing plural "s" dropped"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _term_weights(tokens):
+    counts = {}
+    for token in tokens:
+        counts[token] = counts.get(token, 0) + 1
+    return {term: 1.0 + math.log(count) for term, count in counts.items()}
+
+
+class SymptomRanker:
+    """Ranks knowledge base conditions by TF-IDF cosine similarity between a message and their symptoms.
+
+    The condition x term matrix is kept column-wise: each term maps to the rows (conditions) that
+    mention it and their sublinear term frequencies, cached as NumPy arrays. Scoring a message
+    concatenates the columns of its terms and sums them per row with one `np.bincount`, so the
+    cost grows with the number of matching entries rather than the number of conditions.
+    Adding, editing or removing a condition only touches that condition's columns; removed
+    conditions leave an empty row that is reused by the next addition.
+    """
+
+    def __init__(self, threshold=SYMPTOM_MATCH_THRESHOLD, top_k=SYMPTOM_MATCH_TOP_K):
+        self.threshold = threshold
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self._names = []
+        self._rows = {}
+        self._free_rows = []
+        self._symptoms = {}
+        self._row_terms = []
+        self._postings = {}
+        self._columns = {}
+        self._norms = np.zeros(0)
+        self._norms_dirty = False
+
+    def __len__(self):
+        return len(self._rows)
+
+    def sync(self, kb):
+        """Applies the differences between the indexed conditions and kb"""
+        with self._lock:
+            for name in [name for name in self._rows if name not in kb]:
+                self._remove(name)
+            for name, info in kb.items():
+                symptoms = tuple(info.get("symptoms", []))
+                if self._symptoms.get(name) != symptoms:
+                    self._set(name, symptoms)
+        return self
+
+    def set(self, name, symptoms):
+        with self._lock:
+            self._set(name, tuple(symptoms))
+
+    def remove(self, name):
+        with self._lock:
+            if name in self._rows:
+                self._remove(name)
+
+    def rank(self, text, top_k=None, threshold=None):
+        """Returns up to top_k (condition, score) pairs scoring at least threshold, best first"""
+        top_k = self.top_k if top_k is None else top_k
+        threshold = self.threshold if threshold is None else threshold
+        query = _term_weights(tokenize(text))
+        with self._lock:
+            if self._norms_dirty:
+                self._recompute_norms()
+            n_rows = len(self._names)
+            n_docs = len(self._rows)
+            rows, weights, query_norm = [], [], 0.0
+            for term, tf in query.items():
+                column = self._column(term)
+                if column is None:
+                    continue
+                idf = math.log((1 + n_docs) / (1 + len(column[0]))) + 1
+                rows.append(column[0])
+                weights.append(column[1] * (tf * idf * idf))
+                query_norm += (tf * idf) ** 2
+            if not rows:
+                return []
+            scores = np.bincount(np.concatenate(rows), np.concatenate(weights), minlength=n_rows)
+            scores /= np.where(self._norms > 0, self._norms, 1.0) * math.sqrt(query_norm)
+            candidates = np.flatnonzero(scores >= threshold)
+            if len(candidates) > top_k:
+                candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [(self._names[row], float(scores[row])) for row in candidates]
+
+    def _set(self, name, symptoms):
+        if name in self._rows:
+            self._remove(name)
+        row = self._free_rows.pop() if self._free_rows else len(self._names)
+        if row == len(self._names):
+            self._names.append(None)
+            self._row_terms.append({})
+        terms = _term_weights(tokenize(" ".join(symptoms)))
+        self._names[row] = name
+        self._rows[name] = row
+        self._symptoms[name] = symptoms
+        self._row_terms[row] = terms
+        for term, weight in terms.items():
+            self._postings.setdefault(term, {})[row] = weight
+            self._columns.pop(term, None)
+        self._norms_dirty = True
+
+    def _remove(self, name):
+        row = self._rows.pop(name)
+        del self._symptoms[name]
+        for term in self._row_terms[row]:
+            posting = self._postings[term]
+            del posting[row]
+            if not posting:
+                del self._postings[term]
+            self._columns.pop(term, None)
+        self._names[row] = None
+        self._row_terms[row] = {}
+        self._free_rows.append(row)
+        self._norms_dirty = True
+
+    def _column(self, term):
+        column = self._columns.get(term)
+        if column is None:
+            posting = self._postings.get(term)
+            if not posting:
+                return None
+            column = self._columns[term] = (
+                np.fromiter(posting.keys(), dtype=np.int64, count=len(posting)),
+                np.fromiter(posting.values(), dtype=np.float64, count=len(posting)),
+            )
+        return column
+
+    def _recompute_norms(self):
+        """Row norms depend on every idf, so they are refreshed in one pass after edits"""
+        n_docs = len(self._rows)
+        rows, squares = [], []
+        for term in self._postings:
+            column = self._column(term)
+            idf = math.log((1 + n_docs) / (1 + len(column[0]))) + 1
+            rows.append(column[0])
+            squares.append((column[1] * idf) ** 2)
+        if rows:
+            norms = np.bincount(np.concatenate(rows), np.concatenate(squares), minlength=len(self._names))
+        else:
+            norms = np.zeros(len(self._names))
+        self._norms = np.sqrt(norms)
+        self._norms_dirty = False
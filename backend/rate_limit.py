@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+
+from cache import LRUCache
+from metrics import RATE_LIMITED
+
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "64"))
+DEFAULT_RATE_LIMITS = {
+    "chat": "30/60",
+    "chat_batch": "200/60",
+    "export": "5/60",
+    "feedback": "10/60",
+}
+
+
+def parse_limit(value):
+    """Parses "<requests>/<seconds>" into (capacity, period); "0" or "" disables the limit"""
+    if value.strip() in ("", "0"):
+        return None
+    count, _, period = value.partition("/")
+    return int(count), float(period or 60)
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets holding up to `capacity` tokens that refill over `period` seconds.
+
+    Buckets live in an LRU of at most `max_keys` entries whose TTL is `period`: a bucket idle
+    that long would be full again anyway, so expiring it loses nothing, and memory stays bounded
+    however many users there are. A key evicted early simply starts over with a full bucket.
+    """
+
+    def __init__(self, capacity, period, max_keys=RATE_LIMIT_MAX_KEYS):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.rejected = 0
+        self._buckets = LRUCache(maxsize=max_keys, ttl=period)
+        self._lock = threading.Lock()
+
+    def acquire(self, key, cost=1):
+        """Takes `cost` tokens from key's bucket; returns 0 if allowed, else seconds until it would be.
+
+        A cost above `capacity` is charged as a full bucket, so it can still succeed.
+        """
+        cost = min(cost, self.capacity)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key) or (self.capacity, now)
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            if tokens >= cost:
+                self._buckets.set(key, (tokens - cost, now))
+                return 0
+            self._buckets.set(key, (tokens, now))
+            self.rejected += 1
+            return (cost - tokens) / self.rate
+
+    def stats(self):
+        return {
+            "capacity": self.capacity,
+            "period_s": self.period,
+            "tracked_keys": len(self._buckets),
+            "rejected": self.rejected,
+        }
+
+
+class RateLimits:
+    """Named per-endpoint limiters, configured as RATE_LIMIT_<NAME>="<requests>/<seconds>"."""
+
+    def __init__(self, defaults=DEFAULT_RATE_LIMITS, max_keys=RATE_LIMIT_MAX_KEYS):
+        self.limiters = {}
+        for name, default in defaults.items():
+            limit = parse_limit(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+            if limit is not None:
+                self.limiters[name] = TokenBucketLimiter(*limit, max_keys=max_keys)
+
+    def acquire(self, name, key, cost=1):
+        limiter = self.limiters.get(name)
+        if limiter is None:
+            return 0
+        retry_after = limiter.acquire(key, cost)
+        if retry_after:
+            RATE_LIMITED.inc(limit=name)
+        return retry_after
+
+    def stats(self):
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+
+class ConcurrencyLimiter:
+    """Caps requests in flight; callers reject instead of queueing when `try_acquire` fails."""
+
+    def __init__(self, limit=MAX_CONCURRENT_REQUESTS):
+        self.limit = limit
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.limit > 0 and self.in_flight >= self.limit:
+                self.rejected += 1
+                RATE_LIMITED.inc(limit="concurrency")
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self):
+        return {"limit": self.limit, "in_flight": self.in_flight, "rejected": self.rejected}
+
+
+rate_limits = RateLimits()
+concurrency_limiter = ConcurrencyLimiter()
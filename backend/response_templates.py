@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from knowledge_base import KNOWLEDGE_BASE_PATH, write_json_atomic
+
+TEMPLATE_TRANSLATIONS_PATH = KNOWLEDGE_BASE_PATH.with_name("knowledge_base.translations.json")
+TEMPLATE_WARM_UP = os.getenv("TEMPLATE_WARM_UP", "1").lower() in ("1", "true", "yes")
+TEMPLATE_WARM_UP_TIMEOUT = float(os.getenv("TEMPLATE_WARM_UP_TIMEOUT", "30"))
+WARM_UP_CHUNK = 20
+
+logger = logging.getLogger(__name__)
+
+
+def render_section(condition, info):
+    advice = "".join(f"- {advice}\n" for advice in info.get("advice", []))
+    return f"It seems like you might be experiencing {condition.capitalize()}.\nHere’s some advice that may help:\n{advice}"
+
+
+def render_sections(kb):
+    """Renders the English reply section of every condition"""
+    return {condition: render_section(condition, info) for condition, info in kb.items() if info}
+
+
+def _source_hash(text):
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+class TemplateTranslations:
+    """Pre-translated condition sections, persisted in a JSON file next to the knowledge base.
+
+    Entries are stored per language and condition together with a hash of the English section
+    they were translated from, so an edited condition's stale translation is never served and is
+    dropped on the next `retain`. `warm_up` fills in whatever is missing. English lookups return
+    the retained section itself.
+    """
+
+    def __init__(self, path=TEMPLATE_TRANSLATIONS_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._index = {}
+        self._sources = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                logger.exception("Ignoring unreadable template translations in %s", self.path)
+                self._entries = {}
+        self._reindex()
+
+    def get(self, section, lang):
+        """Returns the stored translation of an English section, or None"""
+        return self._index.get((_source_hash(section), lang))
+
+    def retain(self, sections):
+        """Drops translations of conditions that were removed or whose section changed"""
+        hashes = {condition: _source_hash(section) for condition, section in sections.items()}
+        with self._lock:
+            self._sources = {hashes[condition]: section.strip() for condition, section in sections.items()}
+            changed = False
+            for entries in self._entries.values():
+                for condition in list(entries):
+                    if hashes.get(condition) != entries[condition]["source_hash"]:
+                        del entries[condition]
+                        changed = True
+            if changed:
+                self._save()
+            else:
+                self._reindex()
+        return sections
+
+    def missing(self, sections, lang):
+        entries = self._entries.get(lang, {})
+        return {
+            condition: section for condition, section in sections.items()
+            if entries.get(condition, {}).get("source_hash") != _source_hash(section)
+        }
+
+    async def warm_up(self, sections, languages, translate_batch):
+        """Translates every section missing for each language with `await translate_batch(texts, lang)`,
+        which returns None for texts it could not translate; those are left for the next run.
+        """
+        translated_count = 0
+        for lang in languages:
+            if lang == "en":
+                continue
+            missing = list(self.missing(sections, lang).items())
+            for start in range(0, len(missing), WARM_UP_CHUNK):
+                chunk = missing[start:start + WARM_UP_CHUNK]
+                results = await translate_batch([section.strip() for _, section in chunk], lang)
+                done = [(condition, section, translated) for (condition, section), translated in zip(chunk, results) if translated]
+                if not done:
+                    continue
+                with self._lock:
+                    entries = self._entries.setdefault(lang, {})
+                    for condition, section, translated in done:
+                        entries[condition] = {"source_hash": _source_hash(section), "text": translated}
+                    self._save()
+                translated_count += len(done)
+        return translated_count
+
+    def stats(self):
+        return {lang: len(entries) for lang, entries in self._entries.items()}
+
+    def _save(self):
+        self._reindex()
+        write_json_atomic(self.path, self._entries)
+
+    def _reindex(self):
+        index = {(source_hash, "en"): section for source_hash, section in self._sources.items()}
+        index.update(
+            ((entry["source_hash"], lang), entry["text"])
+            for lang, entries in self._entries.items() for entry in entries.values()
+        )
+        self._index = index
+
+
+template_translations = TemplateTranslations()
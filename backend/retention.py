@@ -0,0 +1,119 @@
+import asyncio
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from db import incremental_vacuum
+from models import archive_chats_before, archive_user_chats_over, users_over_chat_limit
+
+CHAT_RETENTION_DAYS = float(os.getenv("CHAT_RETENTION_DAYS", "0"))
+CHAT_RETENTION_MAX_ROWS = int(os.getenv("CHAT_RETENTION_MAX_ROWS", "0"))
+CHAT_RETENTION_BATCH = int(os.getenv("CHAT_RETENTION_BATCH", "500"))
+CHAT_RETENTION_INTERVAL = float(os.getenv("CHAT_RETENTION_INTERVAL", "3600"))
+CHAT_RETENTION_PAUSE = float(os.getenv("CHAT_RETENTION_PAUSE", "0.05"))
+CHAT_RETENTION_VACUUM_PAGES = int(os.getenv("CHAT_RETENTION_VACUUM_PAGES", "256"))
+
+logger = logging.getLogger(__name__)
+
+
+class ChatRetention:
+    """Background job that moves old chat turns from the live database into the archive.
+
+    Turns older than `max_age_days`, and each user's turns beyond their newest `max_rows`, are
+    moved in transactions of at most `batch_size` rows with a `pause` between them so request
+    writes are never blocked for long. Freed pages are then returned with incremental vacuum,
+    `vacuum_pages` at a time. A limit of 0 disables that rule.
+    """
+
+    def __init__(self, max_age_days=CHAT_RETENTION_DAYS, max_rows=CHAT_RETENTION_MAX_ROWS,
+                 batch_size=CHAT_RETENTION_BATCH, interval=CHAT_RETENTION_INTERVAL,
+                 pause=CHAT_RETENTION_PAUSE, vacuum_pages=CHAT_RETENTION_VACUUM_PAGES):
+        self.max_age_days = max_age_days
+        self.max_rows = max_rows
+        self.batch_size = batch_size
+        self.interval = interval
+        self.pause = pause
+        self.vacuum_pages = vacuum_pages
+        self._task = None
+        self._stop = threading.Event()
+        self.last_run = None
+
+    @property
+    def enabled(self):
+        return self.max_age_days > 0 or self.max_rows > 0
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._stop.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        self._stop.set()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def run_once(self):
+        """Runs one retention pass in the calling thread and returns what it did"""
+        start = time.perf_counter()
+        result = {"archived_by_age": 0, "archived_by_limit": 0, "pages_vacuumed": 0}
+        if self.max_age_days > 0:
+            cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=self.max_age_days)
+            cutoff = cutoff.strftime("%Y-%m-%d %H:%M:%S")
+            result["archived_by_age"] = self._drain(archive_chats_before, cutoff, self.batch_size)
+        if self.max_rows > 0:
+            for user_id in users_over_chat_limit(self.max_rows):
+                if self._stop.is_set():
+                    break
+                result["archived_by_limit"] += self._drain(archive_user_chats_over, user_id, self.max_rows, self.batch_size)
+        if result["archived_by_age"] or result["archived_by_limit"]:
+            result["pages_vacuumed"] = self._drain(incremental_vacuum, self.vacuum_pages)
+        result["elapsed_s"] = round(time.perf_counter() - start, 3)
+        result["finished_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self.last_run = result
+        return result
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "max_age_days": self.max_age_days,
+            "max_rows": self.max_rows,
+            "last_run": self.last_run,
+        }
+
+    def _drain(self, step, *args):
+        """Repeats step(*args) until it does no work, pausing between calls"""
+        total = 0
+        while not self._stop.is_set():
+            done = step(*args)
+            total += done
+            if not done:
+                break
+            time.sleep(self.pause)
+        return total
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                result = await loop.run_in_executor(None, self.run_once)
+                if result["archived_by_age"] or result["archived_by_limit"]:
+                    logger.info("Chat retention pass: %s", result)
+            except sqlite3.Error:
+                logger.exception("Chat retention pass failed; retrying next interval")
+            await asyncio.sleep(self.interval)
+
+
+chat_retention = ChatRetention()
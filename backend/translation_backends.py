@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+PHRASE_TABLE_PATH = Path(__file__).parent / "phrase_table.json"
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("TRANSLATION_CIRCUIT_FAILURES", "3"))
+CIRCUIT_SLOW_CALL_MS = float(os.getenv("TRANSLATION_CIRCUIT_SLOW_MS", "2000"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("TRANSLATION_CIRCUIT_RESET", "30"))
+
+
+class TranslationUnavailable(Exception):
+    pass
+
+
+class GoogleTranslateBackend:
+    """Online backend backed by googletrans; errors propagate to the caller."""
+
+    name = "google"
+
+    def __init__(self, timeout):
+        from googletrans import Translator
+        self.client = Translator(timeout=timeout)
+
+    def translate(self, text, dest_lang):
+        return self.client.translate(text, dest=dest_lang).text
+
+    def translate_batch(self, texts, dest_lang):
+        return [result.text for result in self.client.translate(list(texts), dest=dest_lang)]
+
+
+class PhraseTableBackend:
+    """Offline backend that translates the bot's fixed phrases line by line from a JSON table.
+
+    Outbound text is matched per line (ignoring a leading "- " bullet) against exact phrases and
+    "{}" patterns whose slot is looked up in the table too; lines it does not know stay in
+    English. Inbound text (dest "en") has every known phrase replaced, longest first. Raises
+    TranslationUnavailable when nothing in the text is known.
+    """
+
+    name = "offline"
+
+    def __init__(self, path=PHRASE_TABLE_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            table = json.load(f)
+        self.phrases = {}
+        self.patterns = {}
+        self.reverse = {}
+        for lang, entries in table.items():
+            phrases = {_normalize(en): translated for en, translated in entries.get("phrases", {}).items()}
+            self.phrases[lang] = phrases
+            self.patterns[lang] = [
+                (re.compile("^" + "(.+?)".join(re.escape(part) for part in en.split("{}")) + "$", re.IGNORECASE), translated)
+                for en, translated in entries.get("patterns", {}).items()
+            ]
+            reverse = {}
+            for en, translated in entries.get("phrases", {}).items():
+                reverse.setdefault(translated, en)
+            self.reverse[lang] = sorted(reverse.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def supports(self, dest_lang):
+        return dest_lang == "en" or dest_lang in self.phrases
+
+    def translate(self, text, dest_lang):
+        if dest_lang == "en":
+            return self._to_english(text)
+        phrases = self.phrases.get(dest_lang)
+        if phrases is None:
+            raise TranslationUnavailable(dest_lang)
+        known = False
+        lines = []
+        for line in text.split("\n"):
+            bullet = "- " if line.startswith("- ") else ""
+            translated = self._line(line[len(bullet):], dest_lang)
+            if translated is None:
+                lines.append(line)
+            else:
+                lines.append(bullet + translated)
+                known = True
+        if not known:
+            raise TranslationUnavailable(text)
+        return "\n".join(lines)
+
+    def translate_batch(self, texts, dest_lang):
+        return [self.translate(text, dest_lang) for text in texts]
+
+    def _line(self, line, dest_lang):
+        phrases = self.phrases[dest_lang]
+        translated = phrases.get(_normalize(line))
+        if translated is not None:
+            return translated
+        for pattern, template in self.patterns[dest_lang]:
+            match = pattern.match(line.strip())
+            if match:
+                slot = match.group(1)
+                return template.replace("{}", phrases.get(_normalize(slot), slot))
+        return None
+
+    def _to_english(self, text):
+        replaced = text
+        for reverse in self.reverse.values():
+            for translated, en in reverse:
+                replaced = replaced.replace(translated, f" {en} ")
+        if replaced == text:
+            raise TranslationUnavailable(text)
+        return " ".join(replaced.split())
+
+
+def _normalize(text):
+    return " ".join(text.lower().split())
+
+
+class CircuitBreaker:
+    """Trips after `failure_threshold` consecutive failed or slow calls.
+
+    While open every call is refused; after `reset_timeout` seconds a single trial call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, slow_call_ms=CIRCUIT_SLOW_CALL_MS,
+                 reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.slow_call_ms = slow_call_ms
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record(self, elapsed_s, ok=True):
+        """Records a finished call; calls slower than slow_call_ms count as failures"""
+        failed = not ok or elapsed_s * 1000 >= self.slow_call_ms
+        with self._lock:
+            if not failed:
+                self.state = "closed"
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def stats(self):
+        return {"state": self.state, "consecutive_failures": self.failures, "times_opened": self.opened}
@@ -1,18 +1,251 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cache import LRUCache
+from db import connection
+from metrics import TRANSLATION_FALLBACKS, TRANSLATION_SECONDS, TRANSLATION_TIMEOUTS, timed
+from translation_backends import CircuitBreaker, GoogleTranslateBackend, PhraseTableBackend, TranslationUnavailable
+
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "4096"))
+TRANSLATION_CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", "86400"))
+TRANSLATION_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", "3"))
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "8"))
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", "4"))
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "google")
+
+
+def _text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """In-process LRU in front of the persistent translation_cache table.
+
+    Only outbound translations (the bot's replies) are persisted. Inbound ones (dest "en") are
+    users' own messages, so they stay in the bounded, expiring memory cache only.
+    """
+
+    def __init__(self, maxsize=TRANSLATION_CACHE_SIZE, ttl=TRANSLATION_CACHE_TTL):
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.db_hits = 0
+        self.db_misses = 0
+
+    def get(self, text, dest_lang):
+        translated = self.get_memory(text, dest_lang)
+        if translated is not None:
+            return translated
+        return self.get_persistent(text, dest_lang)
+
+    def get_memory(self, text, dest_lang):
+        return self.memory.get((_text_hash(text), dest_lang))
+
+    def get_persistent(self, text, dest_lang):
+        if dest_lang == "en":
+            return None
+        key = (_text_hash(text), dest_lang)
+        try:
+            with connection() as conn:
+                row = conn.execute(
+                    "SELECT translated FROM translation_cache WHERE text_hash=? AND dest_lang=?", key
+                ).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is None:
+            self.db_misses += 1
+            return None
+        self.db_hits += 1
+        self.memory.set(key, row[0])
+        return row[0]
+
+    def set(self, text, dest_lang, translated):
+        key = (_text_hash(text), dest_lang)
+        self.memory.set(key, translated)
+        if dest_lang == "en":
+            return
+        try:
+            with connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO translation_cache (text_hash, dest_lang, translated) VALUES (?, ?, ?)",
+                    (key[0], key[1], translated)
+                )
+        except sqlite3.Error:
+            pass
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats["db_hits"] = self.db_hits
+        stats["db_misses"] = self.db_misses
+        return stats
+
+
+def create_backend(name, timeout=TRANSLATION_TIMEOUT):
+    if name == "google":
+        return GoogleTranslateBackend(timeout)
+    if name == "offline":
+        return PhraseTableBackend()
+    raise ValueError(f"Unknown translation backend {name!r}")
 
-from googletrans import Translator
 
 class TranslationService:
-    def __init__(self):
-        self.translator = Translator()
+    """Translates through a primary backend guarded by a circuit breaker.
+
+    When the primary backend fails, is slow, or its circuit is open, text is translated by
+    the offline phrase table instead (or returned unchanged if the table does not know it).
+    Only primary-backend results are cached, so they replace fallbacks once it recovers.
+    Backends named by string are created on first use, so importing this module stays cheap.
+    """
+
+    def __init__(self, timeout=TRANSLATION_TIMEOUT, concurrency=TRANSLATION_CONCURRENCY, workers=TRANSLATION_WORKERS,
+                 backend=TRANSLATION_BACKEND):
+        self._backend_name = backend if isinstance(backend, str) else backend.name
+        self._backend = None if isinstance(backend, str) else backend
+        self._offline_backend = None
+        self._init_lock = threading.Lock()
+        self.breaker = CircuitBreaker()
+        self.cache = TranslationCache()
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._init_lock:
+                if self._backend is None:
+                    self._backend = create_backend(self._backend_name, self.timeout)
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend):
+        self._backend = backend
+        self._backend_name = backend.name
+
+    @property
+    def offline(self):
+        if self._offline_backend is None:
+            backend = self.backend
+            self._offline_backend = backend if isinstance(backend, PhraseTableBackend) else PhraseTableBackend()
+        return self._offline_backend
 
     def translate_text(self, text, dest_lang):
+        with timed(TRANSLATION_SECONDS, source="cache_lookup"):
+            cached = self.cache.get(text, dest_lang)
+        if cached is not None:
+            return cached
+        return self._fetch(text, dest_lang)
+
+    def translate_response(self, text, dest_lang):
+        return self.translate_text(text, dest_lang)
+
+    def _fetch(self, text, dest_lang):
+        if self.backend is self.offline:
+            return self._offline(text, dest_lang, "primary")
+        if not self.breaker.allow():
+            return self._offline(text, dest_lang, "circuit_open")
+        start = time.perf_counter()
         try:
-            result = self.translator.translate(text, dest=dest_lang)
-            return result.text
+            with timed(TRANSLATION_SECONDS, source=self.backend.name):
+                translated = self.backend.translate(text, dest_lang)
         except Exception:
+            self.breaker.record(time.perf_counter() - start, ok=False)
+            return self._offline(text, dest_lang, "error")
+        self.breaker.record(time.perf_counter() - start)
+        self.cache.set(text, dest_lang, translated)
+        return translated
+
+    def _offline(self, text, dest_lang, reason):
+        TRANSLATION_FALLBACKS.inc(reason=reason)
+        try:
+            with timed(TRANSLATION_SECONDS, source="offline"):
+                return self.offline.translate(text, dest_lang)
+        except TranslationUnavailable:
             return text
 
-    def translate_response(self, text, dest_lang):
-        return self.translate_text(text, dest_lang)
+    def _lookup_or_fetch(self, text, dest_lang):
+        with timed(TRANSLATION_SECONDS, source="cache_lookup"):
+            cached = self.cache.get_persistent(text, dest_lang)
+        if cached is not None:
+            return cached
+        return self._fetch(text, dest_lang)
+
+    async def translate_text_async(self, text, dest_lang, timeout=None):
+        """Non-blocking translate_text; falls back to the offline backend on timeout"""
+        cached = self.cache.get_memory(text, dest_lang)
+        if cached is not None:
+            return cached
+        try:
+            return await self._run_limited(timeout or self.timeout, self._lookup_or_fetch, text, dest_lang)
+        except asyncio.TimeoutError:
+            TRANSLATION_TIMEOUTS.inc()
+            return self._offline(text, dest_lang, "timeout")
+
+    async def _run_limited(self, timeout, func, *args):
+        """Runs func(*args) on the executor, raising asyncio.TimeoutError after `timeout` seconds
+        including the wait for a slot.
+
+        A slot is only released when the worker finishes, even if the caller has given up, so
+        calls abandoned while the backend is slow cannot pile up in the executor's queue.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        future = loop.run_in_executor(self._executor, func, *args)
+        future.add_done_callback(self._release_slot)
+        return await asyncio.wait_for(asyncio.shield(future), max(0, deadline - loop.time()))
+
+    def _release_slot(self, future):
+        self._semaphore.release()
+        if not future.cancelled():
+            future.exception()
+
+    async def translate_response_async(self, text, dest_lang):
+        return await self.translate_text_async(text, dest_lang)
+
+    def translate_batch(self, texts, dest_lang, fallback=True):
+        """Translates many texts with a single backend request for the cache misses.
+
+        With fallback=False texts the primary backend could not translate come back as None.
+        """
+        results = [self.cache.get(text, dest_lang) for text in texts]
+        missing = list(dict.fromkeys(text for text, result in zip(texts, results) if result is None))
+        if missing:
+            translated = self._fetch_batch(missing, dest_lang, fallback)
+            results = [result if result is not None else translated[text] for text, result in zip(texts, results)]
+        return results
+
+    def _fetch_batch(self, texts, dest_lang, fallback=True):
+        if self.backend is self.offline or not self.breaker.allow():
+            reason = "primary" if self.backend is self.offline else "circuit_open"
+            return {text: self._offline(text, dest_lang, reason) if fallback else None for text in texts}
+        start = time.perf_counter()
+        try:
+            with timed(TRANSLATION_SECONDS, source=f"{self.backend.name}_batch"):
+                translated = dict(zip(texts, self.backend.translate_batch(texts, dest_lang)))
+        except Exception:
+            self.breaker.record(time.perf_counter() - start, ok=False)
+            return {text: self._offline(text, dest_lang, "error") if fallback else None for text in texts}
+        self.breaker.record(time.perf_counter() - start)
+        for text, result in translated.items():
+            self.cache.set(text, dest_lang, result)
+        return translated
+
+    async def translate_batch_async(self, texts, dest_lang, timeout=None, fallback=True):
+        try:
+            return await self._run_limited(timeout or self.timeout, self.translate_batch, texts, dest_lang, fallback)
+        except asyncio.TimeoutError:
+            TRANSLATION_TIMEOUTS.inc()
+            if not fallback:
+                return [None] * len(texts)
+            return [self._offline(text, dest_lang, "timeout") for text in texts]
+
+    def cache_stats(self):
+        return self.cache.stats()
+
+    def backend_stats(self):
+        return {"backend": self._backend_name, "initialized": self._backend is not None, "circuit": self.breaker.stats()}
 
 translator = TranslationService()
@@ -2,45 +2,118 @@ import React, { useState, useEffect, useRef } from "react";
 import axios from "axios";
 import { FaPaperPlane, FaUserCircle } from "react-icons/fa";
 
+const CHAT_PAGE_SIZE = 50;
+
+const readEventStream = async (body, onEvent) => {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      const dataLines = [];
+      raw.split("\n").forEach((line) => {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim());
+      });
+      if (dataLines.length) onEvent(event, JSON.parse(dataLines.join("\n")));
+    }
+  }
+};
+
 const ChatBox = ({ user, onLogout, onUpdateProfile, onFeedback }) => {
   const [messages, setMessages] = useState([]);
   const [userInput, setUserInput] = useState("");
   const [loading, setLoading] = useState(false);
   const [dropdownOpen, setDropdownOpen] = useState(false);
+  const [nextBeforeId, setNextBeforeId] = useState(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
 
   const messagesEndRef = useRef(null);
+  const skipScrollRef = useRef(false);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
   };
 
+  const welcomeMessage = () => ({
+    sender: "bot",
+    text: `Welcome ${user.username}! How can I support your wellness today?`,
+  });
+
+  const chatsToMessages = (chats) =>
+    chats.flatMap((c) => [
+      { sender: "user", text: c.message },
+      { sender: "bot", text: c.response },
+    ]);
+
+  const fetchChatPage = async (beforeId) => {
+    const token = localStorage.getItem("token");
+    const params = { limit: CHAT_PAGE_SIZE };
+    if (beforeId) params.before_id = beforeId;
+    const res = await axios.get(`http://localhost:8000/api/chats/${user.id}`, {
+      params,
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    return res.data;
+  };
+
   useEffect(() => {
     const key = `chat_${user.username}`;
-    const savedData = localStorage.getItem(key);
 
-    if (savedData) {
-      const { messages: savedMessages, timestamp } = JSON.parse(savedData);
-      const now = new Date().getTime();
-      const sevenDays = 7 * 24 * 60 * 60 * 1000;
+    const loadFromCache = () => {
+      const savedData = localStorage.getItem(key);
+      if (savedData) {
+        const { messages: savedMessages, timestamp } = JSON.parse(savedData);
+        const now = new Date().getTime();
+        const sevenDays = 7 * 24 * 60 * 60 * 1000;
 
-      if (now - timestamp < sevenDays) {
-        setMessages(savedMessages);
-        return;
+        if (now - timestamp < sevenDays) {
+          setMessages(savedMessages);
+          return;
+        }
       }
+      setMessages([welcomeMessage()]);
+    };
+
+    if (!user.id) {
+      loadFromCache();
+      return;
     }
 
-    const initialMessage = [
-      {
-        sender: "bot",
-        text: `Welcome ${user.username}! How can I support your wellness today?`,
-      },
-    ];
-    setMessages(initialMessage);
-    localStorage.setItem(
-      key,
-      JSON.stringify({ messages: initialMessage, timestamp: new Date().getTime() })
-    );
-  }, [user.username]);
+    fetchChatPage()
+      .then((data) => {
+        setNextBeforeId(data.next_before_id);
+        setMessages([welcomeMessage(), ...chatsToMessages(data.chats)]);
+      })
+      .catch((err) => {
+        console.error(err);
+        loadFromCache();
+      });
+  }, [user.id, user.username]);
+
+  const loadOlder = async () => {
+    if (!nextBeforeId || loadingOlder) return;
+    setLoadingOlder(true);
+    try {
+      const data = await fetchChatPage(nextBeforeId);
+      setNextBeforeId(data.next_before_id);
+      skipScrollRef.current = true;
+      setMessages((prev) => [prev[0], ...chatsToMessages(data.chats), ...prev.slice(1)]);
+    } catch (err) {
+      console.error(err);
+    }
+    setLoadingOlder(false);
+  };
 
   useEffect(() => {
     if (messages.length === 0) return;
@@ -49,7 +122,13 @@ const ChatBox = ({ user, onLogout, onUpdateProfile, onFeedback }) => {
     localStorage.setItem(key, JSON.stringify({ messages, timestamp: new Date().getTime() }));
   }, [messages, user.username]);
 
-  useEffect(scrollToBottom, [messages]);
+  useEffect(() => {
+    if (skipScrollRef.current) {
+      skipScrollRef.current = false;
+      return;
+    }
+    scrollToBottom();
+  }, [messages]);
 
   const sendMessage = async (e) => {
     e.preventDefault();
@@ -61,14 +140,25 @@ const ChatBox = ({ user, onLogout, onUpdateProfile, onFeedback }) => {
 
     try {
       const token = localStorage.getItem("token");
-      const res = await axios.post(
-        "http://localhost:8000/api/chat",
-        { message: userInput },
-        { headers: { Authorization: `Bearer ${token}` } }
-      );
+      const res = await fetch("http://localhost:8000/api/chat/stream", {
+        method: "POST",
+        headers: { "Content-Type": "application/json", Authorization: `Bearer ${token}` },
+        body: JSON.stringify({ message: userInput }),
+      });
+      if (!res.ok || !res.body) throw new Error(`Chat stream failed with status ${res.status}`);
 
-      const botReply = res.data.response || "I'm here to help!";
-      setMessages([...newMessages, { sender: "bot", text: botReply }]);
+      let botReply = "";
+      await readEventStream(res.body, (event, data) => {
+        if (event === "section") {
+          botReply = botReply ? `${botReply}\n\n${data.text}` : data.text;
+        } else if (event === "done") {
+          botReply = data.response || botReply || "I'm here to help!";
+        } else {
+          return;
+        }
+        setLoading(false);
+        setMessages([...newMessages, { sender: "bot", text: botReply }]);
+      });
     } catch (err) {
       console.error(err);
       setMessages([...newMessages, { sender: "bot", text: "⚠️ Error contacting server." }]);
@@ -78,14 +168,22 @@ const ChatBox = ({ user, onLogout, onUpdateProfile, onFeedback }) => {
     setLoading(false);
   };
 
-  const handleClear = () => {
-    const initialMessage = [
-      {
-        sender: "bot",
-        text: `Welcome ${user.username}! How can I support your wellness today?`,
-      },
-    ];
+  const handleClear = async () => {
+    if (user.id) {
+      try {
+        const token = localStorage.getItem("token");
+        await axios.delete(`http://localhost:8000/api/chats/${user.id}`, {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+      } catch (err) {
+        console.error(err);
+        alert("❌ Failed to clear chat");
+        return;
+      }
+    }
+    const initialMessage = [welcomeMessage()];
     setMessages(initialMessage);
+    setNextBeforeId(null);
     localStorage.setItem(
       `chat_${user.username}`,
       JSON.stringify({ messages: initialMessage, timestamp: new Date().getTime() })
@@ -148,6 +246,17 @@ const ChatBox = ({ user, onLogout, onUpdateProfile, onFeedback }) => {
       </header>
 
       <main className="flex-1 w-full max-w-5xl mt-24 mb-28 px-6 overflow-y-auto space-y-4">
+        {nextBeforeId && (
+          <div className="flex justify-center">
+            <button
+              onClick={loadOlder}
+              disabled={loadingOlder}
+              className="text-sm text-teal-700 border border-teal-700 px-4 py-1 rounded-full hover:bg-teal-50 transition">
+              {loadingOlder ? "Loading..." : "Load older messages"}
+            </button>
+          </div>
+        )}
+
         {messages.map((msg, index) => (
           <div
             key={index}